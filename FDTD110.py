@@ -9,6 +9,8 @@ from pathlib import Path
 import logging
 import os
 
+import datasets
+
 # Chemins robustes (GitHub / Streamlit Cloud)
 BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / "Data"
@@ -216,21 +218,10 @@ if Choices == "Download scraped data":
     else:
         st.warning("Aucune donnée Locations trouvée dans Data/. Veuillez scraper d'abord.")
     # --- Véhicules ---
-    import csv
-
     veh_path = DATA_DIR / "Vehicule.csv"
     if veh_path.exists():
-        # Lire le CSV en mode texte, corriger les caractères problématiques
-        with open(veh_path, "r", encoding="utf-8", errors="ignore") as f:
-            content = f.read()
-
-        # Remplacer les caractères bizarres
-        content = content.replace('""', '"')   # guillemets doubles
-        content = content.replace('?', '')     # supprimer les ?
-        
-        # Charger dans pandas via StringIO
-        from io import StringIO
-        df_veh = pd.read_csv(StringIO(content), quoting=csv.QUOTE_MINIMAL)
+        # export normalisé une seule fois (datasets.source_path), relu tel quel
+        df_veh = pd.read_csv(datasets.source_path("vehicle"))
 
         # Nettoyage PRIX et KILOMETRAGE
         df_veh['PRIX1'] = pd.to_numeric(
@@ -467,7 +458,7 @@ if Choices == "Dashboard of the data":
         if veh_path.exists():
             st.markdown("### Dashboard Véhicules")
 
-            df_raw = pd.read_csv(veh_path)
+            df_raw = pd.read_csv(datasets.source_path("vehicle"))
             df_raw.columns = df_raw.columns.str.strip()
 
             # ===== NETTOYAGE VEHICULE AVEC OUTLIERS =====
@@ -489,7 +480,7 @@ if Choices == "Dashboard of the data":
                 )
 
                 # ---- ANNEE ----
-                df['ANNEE1'] = pd.to_numeric(df['ANNEE'], errors='coerce')
+                df['ANNEE1'] = datasets.annee(df['ANNEE'])   # "Année: 2009"
 
                 # ---- KILOMETRAGE ----
                 if 'KILOMETRAGE' in df.columns:
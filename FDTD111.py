@@ -1,14 +1,27 @@
 import streamlit as st
-import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-from bs4 import BeautifulSoup as bs
-from requests import get
 from pathlib import Path
 import logging
+import time
 import os
 
+from scraper import CATEGORIES, DEFAULT_WORKERS
+from http_cache import HttpCache
+from throttle import Throttle
+from archive import HtmlArchive
+from jobs import JobManager
+from frontier import Frontier
+from dedup import AnnonceIndex
+from delta import DeltaStore
+from fingerprints import PageFingerprints
+from enrich import DetailStore
+import datasets
+from listings import ListingsDB
+from analytics import Analytics
+from runner import OUTPUTS, crawl_id, run_scrape
+
 # Chemins robustes (GitHub / Streamlit Cloud)
 BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / "Data"
@@ -25,6 +38,106 @@ st.markdown("Application de web scraping Véhicules -  Motos - Locations")
 def convert_df(df):
     return df.to_csv(index=False).encode("utf-8")
 
+@st.cache_resource(max_entries=6)
+def get_dataset(type_, version):
+    # un seul DataFrame par processus, adossé au fichier Arrow mappé en mémoire et partagé
+    # par toutes les sessions : lecture seule. version change avec le CSV source.
+    return datasets.load(type_)
+
+@st.cache_resource
+def get_listings():
+    return ListingsDB()
+
+@st.cache_resource
+def get_analytics():
+    # agrégations sur DuckDB si installé, sinon sur SQLite
+    return Analytics(get_listings())
+
+def listings_db(type_):
+    # base des annonces, resynchronisée avec le jeu nettoyé de Data/ quand le CSV change
+    db = get_listings()
+    if datasets.exists(type_):
+        version = datasets.version(type_)
+        db.sync(f"data:{type_}", version, lambda: db.import_dataset(type_, get_dataset(type_, version)))
+    return db
+
+def listing_filters(db, type_, key):
+    # filtres appliqués par des requêtes indexées (marque, année)
+    col1, col2 = st.columns(2)
+    marque = col1.selectbox("Marque", ["Toutes"] + db.values(type_, "marque"), key=f"marque-{key}")
+    annees = db.values(type_, "annee")
+    annee = None
+    if len(annees) > 1:
+        annee = col2.slider("Année", int(annees[0]), int(annees[-1]), (int(annees[0]), int(annees[-1])),
+                            key=f"annee-{key}")
+    return {"marque": None if marque == "Toutes" else marque, "annee": annee}
+
+def top_chart(type_, column, palette, filters):
+    top = get_analytics().top(type_, column, **filters)
+    plt.figure(figsize=(6, 5))
+    sns.barplot(x="annonces", y=column, data=top, palette=palette)
+    st.pyplot(plt.gcf())
+    plt.close()
+
+@st.cache_resource
+def get_http_cache():
+    return HttpCache()
+
+@st.cache_resource
+def get_throttle(rate):
+    # partagé entre les sessions : tous les utilisateurs respectent la même limite
+    return Throttle(rate=rate)
+
+@st.cache_resource
+def get_job_manager():
+    # partagé par toutes les sessions : les résultats restent disponibles après un rerun
+    return JobManager()
+
+@st.cache_resource
+def get_frontier():
+    return Frontier()
+
+@st.cache_resource
+def get_annonce_index():
+    # index des annonces déjà ingérées ; rempli une première fois depuis Data/ et les exports
+    index = AnnonceIndex()
+    if not len(index):
+        index.bootstrap(list(DATA_DIR.glob("*.csv")) + [Path(f) for f in OUTPUTS.values()])
+    return index
+
+@st.cache_resource
+def get_fingerprints():
+    return PageFingerprints()
+
+@st.cache_resource
+def get_detail_store():
+    return DetailStore()
+
+@st.cache_resource
+def get_delta_store():
+    return DeltaStore()
+
+def show_job(job):
+    labels = {"pending": "en attente", "running": "en cours", "done": "terminé",
+              "cancelled": "annulé", "failed": "en erreur"}
+    st.progress(min(job.progress, 1.0), text=f"Tâche {job.id} ({job.label}) : {labels[job.status]}")
+    for message in job.messages:
+        st.caption(message)
+
+    if job.active:
+        if st.button("■ Annuler", key=f"cancel-{job.id}"):
+            job.cancel()
+        time.sleep(1)
+        st.rerun()
+    elif job.status == "failed":
+        st.error(f"Erreur pendant le scraping : {job.error}")
+    elif job.status == "cancelled":
+        st.warning("Scraping annulé.")
+    elif job.result:
+        titles = {"vehicle": "Vehicles_data", "moto": "Motocycles_data", "location": "Locations_data"}
+        for i, (type_, df) in enumerate(job.result.items(), 1):
+            load(df, titles[type_], str(i), f"{job.id}-{i}")
+
 def load(dataframe, title, key1, key2):
     st.write(f"Dimensions : {dataframe.shape}")
     st.dataframe(dataframe)
@@ -36,83 +149,28 @@ def load(dataframe, title, key1, key2):
         key=key2
     )
 
-def get_proprietaire(container):
-    txt = container.get_text(" ", strip=True)
-    if "Par " in txt:
-        return txt.split("Par ")[1].split("Appeler")[0].strip().title()
-    return "Inconnu"
-
-def get_adresse(container, type_):
-    if type_ in ["vehicle","moto", "location"]:
-        adresse_tag = container.find("div", class_="col-12 entry-zone-address")
-        if adresse_tag:
-            return adresse_tag.text.strip()
-
-def scrape_listing(url, type_):
-    soup = bs(get(url).text, "html.parser")
-
-    if type_ == "vehicle":
-        containers = soup.find_all("div", class_="listings-cards__list-item mb-md-3 mb-3")
-    else:
-        containers = soup.find_all("div", class_="listing-card__content p-2")
-
-    data = []
-    for c in containers:
-        try:
-            title = c.find("h2").text.split()
-            marque = title[0]
-            annee = int(title[-1])
-            prix = int(c.find("h3").text.replace(" F CFA", "").replace("\u202f", ""))
-            proprietaire = get_proprietaire(c)
-            adresse = get_adresse(c, type_)
-
-            if type_ == "vehicle":
-                infos = c.find_all("li")
-                kilometrage = int(infos[1].text.replace(" km", "").replace("\u202f", ""))
-                boite = infos[2].text
-                carburant = infos[3].text
-                data.append({
-                    "marque": marque,
-                    "annee": annee,
-                    "prix": prix,
-                    "adresse": adresse,
-                    "kilometrage": kilometrage,
-                    "boite": boite,
-                    "carburant": carburant,
-                    "proprietaire": proprietaire
-                })
-
-            elif type_ == "moto":
-                infos = c.find_all("li")
-                kilometrage = int(infos[1].text.replace(" km", "").replace("\u202f", ""))
-                data.append({
-                    "marque": marque,
-                    "annee": annee,
-                    "prix": prix,
-                    "adresse": adresse,
-                    "kilometrage": kilometrage,
-                    "proprietaire": proprietaire
-                })
-
-            else:  # location
-                proprietaire_tag = c.find("span", class_="owner")
-                proprietaire = proprietaire_tag.text.strip() if proprietaire_tag else "Inconnu"
-                data.append({
-                    "marque": marque,
-                    "annee": annee,
-                    "prix": prix,
-                    "adresse": adresse,
-                    "proprietaire": proprietaire
-                })
-
-        except Exception as e:
-            logging.warning(f"Erreur scraping : {e}")
-
-    return pd.DataFrame(data)
-
 # ================= SIDEBAR =================
 st.sidebar.header("Paramètres")
 Pages = st.sidebar.selectbox("Nombre de pages à scraper", list(np.arange(1, 51)))
+Full_catalog = st.sidebar.checkbox("Catalogue complet (toutes les pages)",
+                                   help="Détecte la dernière page de chaque catégorie et crawle tout en parallèle")
+Workers = st.sidebar.slider("Téléchargements en parallèle", 1, 32, DEFAULT_WORKERS)
+Use_cache = st.sidebar.checkbox("Utiliser le cache HTTP", value=True)
+Rate = st.sidebar.slider("Requêtes / seconde max", 1, 20, 5)
+Skip_unchanged = st.sidebar.checkbox("Ne pas re-parser les pages inchangées", value=True,
+                                     help="Empreinte du contenu de chaque page : les annonces d'une page identique "
+                                          "au dernier passage sont reprises sans parsing")
+Archive_html = st.sidebar.checkbox("Archiver le HTML brut", value=True,
+                                   help="Permet de re-parser les pages plus tard sans re-crawler le site")
+History = st.sidebar.checkbox("Historique des prix", value=True,
+                              help="Enregistre les nouvelles annonces, les changements de prix / kilométrage et les "
+                                   "disparitions ; les annonces déjà connues sont alors re-scrapées")
+# l'historique a besoin de revoir les annonces connues : les deux options s'excluent
+Dedup = st.sidebar.checkbox("Ignorer les annonces déjà ingérées", value=not History, disabled=History,
+                            help="Index persistant des identifiants d'annonce : les doublons ne sont ni parsés ni écrits. "
+                                 "Sans effet avec l'historique des prix, qui re-scrape les annonces connues")
+Multiprocess = st.sidebar.checkbox("Parser sur plusieurs processus", value=(os.cpu_count() or 1) > 1,
+                                   help="Téléchargement et parsing en parallèle (utile pour les gros crawls)")
 Choices = st.sidebar.selectbox("Options", [
     "Scrape data using BeautifulSoup",
     "Download scraped data",
@@ -123,6 +181,17 @@ Choices = st.sidebar.selectbox("Options", [
 # ================= LOGIQUE =================
 if Choices == "Scrape data using BeautifulSoup":
 
+    manager = get_job_manager()
+
+    # résultats déjà disponibles (autres tâches de cette session ou d'autres utilisateurs) ;
+    # la tâche suivie par la session est affichée plus bas, une seule fois
+    finished = [j for j in manager.list("done") if j.id != st.session_state.get("scrape_job")]
+    if finished:
+        choice = st.selectbox("Résultats de scraping disponibles",
+                              ["—"] + [f"{j.id} — {j.label} — {time.strftime('%d/%m %H:%M', time.localtime(j.finished))}" for j in finished])
+        if choice != "—":
+            show_job(manager.get(choice.split(" — ")[0]))
+
     st.subheader("Choisissez les données à scraper")
 
     col1, col2, col3 = st.columns(3)
@@ -137,46 +206,61 @@ if Choices == "Scrape data using BeautifulSoup":
         st.info("Veuillez sélectionner au moins une catégorie.")
         st.stop()
 
-    if st.button("▶ Lancer le scraping"):
-
-        progress = st.progress(0.0)
-        Vehicles_df = pd.DataFrame()
-        Motocycles_df = pd.DataFrame()
-        Locations_df = pd.DataFrame()
-
-        for p in range(1, Pages + 1):
-
-            if scrape_vehicles:
-                Vehicles_df = pd.concat([Vehicles_df,
-                    scrape_listing(f"https://dakar-auto.com/senegal/voitures-4?page={p}", "vehicle")],
-                    ignore_index=True
-                )
-
-            if scrape_motos:
-                Motocycles_df = pd.concat([Motocycles_df,
-                    scrape_listing(f"https://dakar-auto.com/senegal/motos-and-scooters-3?page={p}", "moto")],
-                    ignore_index=True
-                )
-
-            if scrape_locations:
-                Locations_df = pd.concat([Locations_df,
-                    scrape_listing(f"https://dakar-auto.com/senegal/location-de-voitures-19?page={p}", "location")],
-                    ignore_index=True
-                )
-
-            progress.progress(p / Pages)
+    incremental = st.checkbox(
+        "Mode incrémental (s'arrêter à la première page d'annonces déjà connues)",
+        help="Les annonces déjà présentes dans Data/ et dans les exports précédents ne sont pas re-scrapées."
+    )
 
-        if scrape_vehicles:
-            Vehicles_df.to_csv("Vehicles_data.csv", index=False)
-            load(Vehicles_df, "Vehicles_data", "1", "101")
+    selected = [type_ for type_, checked in zip(CATEGORIES, (scrape_vehicles, scrape_motos, scrape_locations)) if checked]
+    frontier = get_frontier()
+    # un seul scraping à la fois, tous utilisateurs confondus : les tâches écrivent les mêmes
+    # exports et la même frontière
+    busy = any(j.active for j in manager.list())
+    # un crawl interrompu (coupure réseau, redémarrage) peut être repris
+    resumable = frontier.unfinished(crawl_id(selected, Pages)) and not busy
+
+    col_run, col_replay, col_resume, col_enrich = st.columns(4)
+    run = col_run.button("▶ Lancer le scraping", disabled=busy)
+    offline = col_replay.button("↻ Re-parser l'archive (hors ligne)", disabled=busy)
+    resume = col_resume.button("⏯ Reprendre le crawl interrompu", disabled=not resumable)
+    enrich = col_enrich.button("✚ Compléter via les pages détail", disabled=busy,
+                               help="Télécharge la page détail des annonces aux champs manquants (une fois par annonce)")
+    if busy:
+        st.info("Un scraping est en cours : un nouveau lancement sera possible à sa fin.")
+
+    if run or offline or resume or enrich:
+        mode = ("offline" if offline else "resume" if resume else "enrich" if enrich else "catalog" if Full_catalog
+                else "incremental" if incremental else "full")
+        job = manager.submit(
+            f"{', '.join(selected)} / {Pages} pages / {mode}", run_scrape, exclusive=True,
+            selected=selected, pages=Pages, mode=mode, workers=Workers,
+            cache=get_http_cache() if Use_cache else None,
+            throttle=get_throttle(Rate),
+            archive=HtmlArchive() if Archive_html else None,
+            multiprocess=Multiprocess,
+            frontier=frontier,
+            seen=get_annonce_index() if Dedup else None,
+            known=get_annonce_index(),
+            fingerprints=get_fingerprints() if Skip_unchanged else None,
+            details=get_detail_store(),
+            listings=get_listings(),
+            deltas=get_delta_store() if History else None,
+        )
+        if job is None:
+            st.warning("Un scraping est déjà en cours : attendez qu'il se termine avant d'en lancer un autre.")
+        else:
+            st.session_state["scrape_job"] = job.id
 
-        if scrape_motos:
-            Motocycles_df.to_csv("Motocycles_data.csv", index=False)
-            load(Motocycles_df, "Motocycles_data", "2", "102")
+    # l'interface ne fait que suivre la tâche en cours
+    job = manager.get(st.session_state.get("scrape_job", ""))
+    if job:
+        show_job(job)
 
-        if scrape_locations:
-            Locations_df.to_csv("Locations_data.csv", index=False)
-            load(Locations_df, "Locations_data", "3", "103")
+    if History:
+        drops = get_delta_store().price_drops(since=time.time() - 7 * 24 * 3600)
+        if len(drops):
+            st.markdown("### Baisses de prix (7 derniers jours)")
+            st.dataframe(drops)
 
 
 # ===================== CONFIG =====================
@@ -186,49 +270,27 @@ DATA_DIR = BASE_DIR / "Data"
 sns.set_style("whitegrid")
 # ===================== DOWNLOAD =====================
 if Choices == "Download scraped data":
-    # --- Motos ---
-    moto_path = DATA_DIR / "Moto.csv"
-    if moto_path.exists():
-        df_moto = pd.read_csv(moto_path)
-        st.markdown("### Télécharger les données Motos")
-        st.download_button(
-            label="Télécharger Motos",
-            data=df_moto.to_csv(index=False),
-            file_name=moto_path.name,
-            mime="text/csv"
-        )
-        st.dataframe(df_moto.head(20))
-    else:
-        st.warning("Aucune donnée Moto trouvée dans Data/. Veuillez scraper d'abord.")
-
-    # --- Locations ---
-    loc_path = DATA_DIR / "Location.csv"
-    if loc_path.exists():
-        df_loc = pd.read_csv(loc_path)
-        st.markdown("### Télécharger les données Locations")
-        st.download_button(
-            label="Télécharger Location",
-            data=df_loc.to_csv(index=False),
-            file_name=loc_path.name,
-            mime="text/csv"
-        )
-        st.dataframe(df_loc.head(20))
-    else:
-        st.warning("Aucune donnée Locations trouvée dans Data/. Veuillez scraper d'abord.")
-    # --- Véhicules ---
-    veh_path = DATA_DIR / "Vehicule.csv"
-    if veh_path.exists():
-        df_veh = pd.read_csv(veh_path, encoding='utf-8', errors='replace')
-        st.markdown("### Télécharger les données Véhicules")
-        st.download_button(
-            label="Télécharger Véhicules",
-            data=df_veh.to_csv(index=False),
-            file_name=veh_path.name,
-            mime="text/csv"
-        )
-        st.dataframe(df_veh.head(20))
-    else:
-        st.warning("Aucune donnée Véhicules trouvée dans Data/. Veuillez scraper d'abord.")
+    # requêtes sur la base des annonces ; le CSV n'est plus qu'un format d'export
+    downloads = [
+        ("moto", "Motos", "Télécharger Motos"),
+        ("location", "Locations", "Télécharger Location"),
+        ("vehicle", "Véhicules", "Télécharger Véhicules"),
+    ]
+    for type_, label, button in downloads:
+        db = listings_db(type_)
+        if db.count(type_):
+            st.markdown(f"### Télécharger les données {label}")
+            df = db.query(type_, **listing_filters(db, type_, f"download-{type_}"))
+            st.download_button(
+                label=button,
+                data=convert_df(df),
+                file_name=f"{label}.csv",
+                mime="text/csv",
+                key=f"download-{type_}"
+            )
+            st.dataframe(df.head(20))
+        else:
+            st.warning(f"Aucune donnée {label} trouvée dans Data/. Veuillez scraper d'abord.")
 
     
 # ===================== DASHBOARD =====================
@@ -239,96 +301,30 @@ if Choices == "Dashboard of the data":
     # ================= DASHBOARD MOTOS ================
     # ==================================================
     with tabs[0]:
-        moto_path = DATA_DIR / "Moto.csv"
+        db = listings_db("moto")
 
-        if moto_path.exists():
+        if db.count("moto"):
             st.markdown("### Dashboard Motos")
-
-            df_raw = pd.read_csv(moto_path)
-            df_raw.columns = df_raw.columns.str.strip()
-
-            # ===== NETTOYAGE MOTOS AVEC OUTLIERS =====
-            def clean_moto(df):
-                df = df.copy()
-
-                # ---- MARQUE / MODELE / VILLE ----
-                def extract_infos(value):
-                    if pd.isna(value):
-                        return None, None, None
-                    parts = str(value).split()
-                    marque = parts[0] if len(parts) >= 1 else None
-                    modele = parts[1] if len(parts) >= 2 else None
-                    ville = parts[-1] if len(parts) >= 3 else None
-                    return marque, modele, ville
-
-                df[['Marque1', 'Modele', 'Ville']] = df['MARQUE'].apply(
-                    lambda x: pd.Series(extract_infos(x))
-                )
-
-                # ---- ANNEE ----
-                df['ANNEE1'] = pd.to_numeric(df['ANNEE'], errors='coerce')
-
-                # ---- KILOMETRAGE ----
-                df['KILOMETRAGE'] = pd.to_numeric(df['KILOMETRAGE'].astype(str).str.replace(r'[^\d]', '', regex=True), errors='coerce')
-
-                # ---- PRIX ----
-                df['PRIX1'] = pd.to_numeric(df['PRIX'].astype(str).str.replace(r'[^\d]', '', regex=True), errors='coerce')
-
-                # ---- GESTION DES OUTLIERS ----
-                # Prix et Kilométrage : suppression valeurs extrêmes (> 3 écarts-types)
-                df = df[(df['PRIX1'] <= df['PRIX1'].mean() + 3*df['PRIX1'].std()) &
-                        (df['PRIX1'] >= df['PRIX1'].mean() - 3*df['PRIX1'].std())]
-
-                df = df[(df['KILOMETRAGE'] <= df['KILOMETRAGE'].mean() + 3*df['KILOMETRAGE'].std()) &
-                        (df['KILOMETRAGE'] >= df['KILOMETRAGE'].mean() - 3*df['KILOMETRAGE'].std())]
-
-                # Remplacer valeurs manquantes par médiane
-                df['PRIX1'].fillna(df['PRIX1'].median(), inplace=True)
-                df['KILOMETRAGE'].fillna(df['KILOMETRAGE'].median(), inplace=True)
-
-                # ---- SUPPRESSION LIGNES VIDES ESSENTIELLES ----
-                df = df.dropna(subset=['Marque1', 'Modele', 'PRIX1'])
-
-                # ---- SUPPRESSION DOUBLONS ----
-                df = df.drop_duplicates(subset=['Marque1', 'Modele', 'ANNEE1', 'PRIX1'])
-
-                return df
-
-            df_moto = clean_moto(df_raw)
+            filters = listing_filters(db, "moto", "moto")
 
             # ===== KPI =====
+            stats = get_analytics().price_stats("moto", **filters)
             col1, col2, col3 = st.columns(3)
-            col1.metric("Total annonces", len(df_moto))
-            col2.metric("Prix moyen (F CFA)", int(df_moto['PRIX1'].mean()))
-            col3.metric("Prix maximum (F CFA)", int(df_moto['PRIX1'].max()))
+            col1.metric("Total annonces", int(stats["total"]))
+            col2.metric("Prix moyen (F CFA)", int(stats["prix_moyen"] or 0))
+            col3.metric("Prix maximum (F CFA)", int(stats["prix_max"] or 0))
 
             # ===== APERÇU =====
             st.subheader("Aperçu des motos")
-            st.dataframe(df_moto[['Marque1', 'Modele', 'Ville', 'ANNEE1', 'PRIX1', 'KILOMETRAGE']].head(20))
+            st.dataframe(db.query("moto", limit=20, **filters)[['marque', 'modele', 'adresse', 'annee', 'prix', 'kilometrage']])
 
             # ===== TOP 5 MARQUES =====
             st.subheader("Top 5 marques de motos")
-            plt.figure(figsize=(6, 5))
-            sns.countplot(
-                y="Marque1",
-                data=df_moto,
-                order=df_moto['Marque1'].value_counts().index[:5],
-                palette="magma"
-            )
-            st.pyplot(plt.gcf())
-            plt.close()
+            top_chart("moto", "marque", "magma", filters)
 
             # ===== TOP 5 MODELES =====
             st.subheader("Top 5 modèles de motos")
-            plt.figure(figsize=(6, 5))
-            sns.countplot(
-                y="Modele",
-                data=df_moto,
-                order=df_moto['Modele'].value_counts().index[:5],
-                palette="viridis"
-            )
-            st.pyplot(plt.gcf())
-            plt.close()
+            top_chart("moto", "modele", "viridis", filters)
 
         else:
             st.warning("Fichier Moto.csv introuvable dans Data/")
@@ -337,213 +333,61 @@ if Choices == "Dashboard of the data":
     # =============== DASHBOARD LOCATION ===============
     # ==================================================
     with tabs[1]:
-        loc_path = DATA_DIR / "Location.csv"
+        db = listings_db("location")
 
-        if loc_path.exists():
+        if db.count("location"):
             st.markdown("### Dashboard Location")
-
-            df_raw = pd.read_csv(loc_path)
-            df_raw.columns = df_raw.columns.str.strip()
-
-            # ===== NETTOYAGE LOCATION AVEC OUTLIERS =====
-            def clean_location(df):
-                df = df.copy()
-
-                # ---- MARQUE / MODELE ----
-                def extract_infos(value):
-                    if pd.isna(value):
-                        return None, None
-                    parts = str(value).split()
-                    marque = parts[0] if len(parts) >= 1 else None
-                    modele = parts[1] if len(parts) >= 2 else None
-                    return marque, modele
-
-                df[['Marque1', 'Modele']] = df['MARQUE'].apply(lambda x: pd.Series(extract_infos(x)))
-
-                # ---- ANNEE ----
-                df['ANNEE1'] = pd.to_numeric(df['ANNEE'], errors='coerce')
-
-                # ---- PRIX ----
-                df['PRIX1'] = pd.to_numeric(df['PRIX'].astype(str).str.replace(r'[^\d]', '', regex=True), errors='coerce')
-
-                # ---- SUPPRESSION DES VALEURS IMPOSSIBLES / EXTREMES ----
-                min_prix = 10000      # valeur minimale réaliste pour la location
-                max_prix = 250000    # valeur maximale réaliste pour la location
-
-                # Filtrer par min/max et par 3 écarts-types
-                mean = df['PRIX1'].mean()
-                std = df['PRIX1'].std()
-                df = df[(df['PRIX1'] >= min_prix) & (df['PRIX1'] <= max_prix)]
-                df = df[(df['PRIX1'] <= mean + 3*std) & (df['PRIX1'] >= mean - 3*std)]
-
-                # ---- SUPPRESSION DES NAN ----
-                df['PRIX1'].fillna(df['PRIX1'].median(), inplace=True)
-
-                # ---- SUPPRESSION LIGNES VIDES ESSENTIELLES ----
-                df = df.dropna(subset=['Marque1', 'Modele', 'PRIX1'])
-
-                # ---- SUPPRESSION DOUBLONS ----
-                df = df.drop_duplicates(subset=['Marque1', 'Modele', 'ANNEE1', 'PRIX1'])
-
-                # ---- VILLE ----
-                if 'ADRESSE' in df.columns:
-                    df['Ville'] = df['ADRESSE']
-                else:
-                    df['Ville'] = None
-
-                return df
-
-
-            df_loc = clean_location(df_raw)
+            filters = listing_filters(db, "location", "location")
 
             # ===== KPI =====
+            stats = get_analytics().price_stats("location", **filters)
             col1, col2, col3 , col4  = st.columns(4)
-            col1.metric("Total annonces", len(df_loc))
-            col2.metric("Prix minimum de location (F CFA)", int(df_loc['PRIX1'].min()))
-            col3.metric("Prix moyen de location (F CFA)", int(df_loc['PRIX1'].mean()))
-            col4.metric("Prix maximum de location (F CFA)", int(df_loc['PRIX1'].max()))
+            col1.metric("Total annonces", int(stats["total"]))
+            col2.metric("Prix minimum de location (F CFA)", int(stats["prix_min"] or 0))
+            col3.metric("Prix moyen de location (F CFA)", int(stats["prix_moyen"] or 0))
+            col4.metric("Prix maximum de location (F CFA)", int(stats["prix_max"] or 0))
 
             # ===== APERÇU =====
             st.subheader("Aperçu des locations")
-            st.dataframe(df_loc[['Marque1', 'Modele', 'Ville', 'ANNEE1', 'PRIX1']].head(20))
+            st.dataframe(db.query("location", limit=20, **filters)[['marque', 'modele', 'adresse', 'annee', 'prix']])
 
             # ===== TOP 5 MARQUES =====
             st.subheader("Top 5 marques en location")
-            plt.figure(figsize=(6, 5))
-            sns.countplot(
-                y="Marque1",
-                data=df_loc,
-                order=df_loc['Marque1'].value_counts().index[:5],
-                palette="coolwarm"
-            )
-            st.pyplot(plt.gcf())
-            plt.close()
+            top_chart("location", "marque", "coolwarm", filters)
 
             # ===== TOP 5 MODELES =====
             st.subheader("Top 5 modèles en location")
-            plt.figure(figsize=(6, 5))
-            sns.countplot(
-                y="Modele",
-                data=df_loc,
-                order=df_loc['Modele'].value_counts().index[:5],
-                palette="viridis"
-            )
-            st.pyplot(plt.gcf())
-            plt.close()
+            top_chart("location", "modele", "viridis", filters)
 
         else:
             st.warning("Fichier Location.csv introuvable dans Data/")
     # ================= DASHBOARD VEHICULE =====================
     with tabs[2]:
-        veh_path = DATA_DIR / "Vehicule.csv"
+        db = listings_db("vehicle")
 
-        if veh_path.exists():
+        if db.count("vehicle"):
             st.markdown("### Dashboard Véhicules")
-
-            df_raw = pd.read_csv(veh_path)
-            df_raw.columns = df_raw.columns.str.strip()
-
-            # ===== NETTOYAGE VEHICULE AVEC OUTLIERS =====
-            def clean_vehicule(df):
-                df = df.copy()
-
-                # ---- MARQUE / MODELE / VILLE ----
-                def extract_infos(value):
-                    if pd.isna(value):
-                        return None, None, None
-                    parts = str(value).split()
-                    marque = parts[0] if len(parts) >= 1 else None
-                    modele = parts[1] if len(parts) >= 2 else None
-                    ville = parts[-1] if len(parts) >= 3 else None
-                    return marque, modele, ville
-
-                df[['Marque1', 'Modele', 'Ville']] = df['MARQUE'].apply(
-                    lambda x: pd.Series(extract_infos(x))
-                )
-
-                # ---- ANNEE ----
-                df['ANNEE1'] = pd.to_numeric(df['ANNEE'], errors='coerce')
-
-                # ---- KILOMETRAGE ----
-                if 'KILOMETRAGE' in df.columns:
-                    df['KILOMETRAGE'] = pd.to_numeric(
-                        df['KILOMETRAGE'].astype(str).str.replace(r'[^\d]', '', regex=True),
-                        errors='coerce'
-                    )
-                else:
-                    df['KILOMETRAGE'] = None
-
-                # ---- PRIX ----
-                df['PRIX1'] = pd.to_numeric(
-                    df['PRIX'].astype(str).str.replace(r'[^\d]', '', regex=True),
-                    errors='coerce'
-                )
-
-                # ---- SUPPRESSION VALEURS IMPOSSIBLES ----
-                df = df[(df['PRIX1'] > 0)]
-                if 'KILOMETRAGE' in df.columns:
-                    df = df[df['KILOMETRAGE'] > 0]
-
-                # ---- GESTION DES OUTLIERS ----
-                df = df[(df['PRIX1'] <= df['PRIX1'].mean() + 3*df['PRIX1'].std()) &
-                        (df['PRIX1'] >= df['PRIX1'].mean() - 3*df['PRIX1'].std())]
-
-                if 'KILOMETRAGE' in df.columns:
-                    df = df[(df['KILOMETRAGE'] <= df['KILOMETRAGE'].mean() + 3*df['KILOMETRAGE'].std()) &
-                            (df['KILOMETRAGE'] >= df['KILOMETRAGE'].mean() - 3*df['KILOMETRAGE'].std())]
-
-                # Remplacer valeurs manquantes par médiane
-                df['PRIX1'].fillna(df['PRIX1'].median(), inplace=True)
-                if 'KILOMETRAGE' in df.columns:
-                    df['KILOMETRAGE'].fillna(df['KILOMETRAGE'].median(), inplace=True)
-
-                # ---- SUPPRESSION LIGNES VIDES ESSENTIELLES ----
-                df = df.dropna(subset=['Marque1', 'Modele', 'PRIX1'])
-
-                # ---- SUPPRESSION DOUBLONS ----
-                df = df.drop_duplicates(subset=['Marque1', 'Modele', 'ANNEE1', 'PRIX1'])
-
-                return df
-
-            df_veh = clean_vehicule(df_raw)
+            filters = listing_filters(db, "vehicle", "vehicle")
 
             # ===== KPI =====
+            stats = get_analytics().price_stats("vehicle", **filters)
             col1, col2, col3, col4 = st.columns(4)
-            col1.metric("Total annonces", len(df_veh))
-            col2.metric("Prix minimum (F CFA)", int(df_veh['PRIX1'].min()))
-            col3.metric("Prix moyen (F CFA)", int(df_veh['PRIX1'].mean()))
-            col4.metric("Prix maximum (F CFA)", int(df_veh['PRIX1'].max()))
+            col1.metric("Total annonces", int(stats["total"]))
+            col2.metric("Prix minimum (F CFA)", int(stats["prix_min"] or 0))
+            col3.metric("Prix moyen (F CFA)", int(stats["prix_moyen"] or 0))
+            col4.metric("Prix maximum (F CFA)", int(stats["prix_max"] or 0))
 
             # ===== APERÇU =====
             st.subheader("Aperçu des véhicules")
-            cols_to_show = ['Marque1', 'Modele', 'Ville', 'ANNEE1', 'PRIX1']
-            if 'KILOMETRAGE' in df_veh.columns:
-                cols_to_show.append('KILOMETRAGE')
-            st.dataframe(df_veh[cols_to_show].head(20))
+            st.dataframe(db.query("vehicle", limit=20, **filters)[['marque', 'modele', 'adresse', 'annee', 'prix', 'kilometrage']])
 
             # ===== TOP 5 MARQUES =====
             st.subheader("Top 5 marques")
-            plt.figure(figsize=(6,5))
-            sns.countplot(
-                y="Marque1",
-                data=df_veh,
-                order=df_veh['Marque1'].value_counts().index[:5],
-                palette="coolwarm"
-            )
-            st.pyplot(plt.gcf())
-            plt.close()
+            top_chart("vehicle", "marque", "coolwarm", filters)
 
             # ===== TOP 5 MODELES =====
             st.subheader("Top 5 modèles")
-            plt.figure(figsize=(6,5))
-            sns.countplot(
-                y="Modele",
-                data=df_veh,
-                order=df_veh['Modele'].value_counts().index[:5],
-                palette="viridis"
-            )
-            st.pyplot(plt.gcf())
-            plt.close()
+            top_chart("vehicle", "modele", "viridis", filters)
 
         else:
             st.warning("Fichier Vehicule.csv introuvable dans Data/")
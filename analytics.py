@@ -0,0 +1,103 @@
+from pathlib import Path
+import threading
+import logging
+
+# Agrégations des dashboards (statistiques de prix, top 5) sur un moteur SQL colonne
+# embarqué (DuckDB, optionnel) : seul le petit résultat revient en Python, la latence
+# reste stable quand la base grossit. DuckDB garde sa propre copie de la table des
+# annonces (Data/listings.duckdb), tenue à jour par synchronisation incrémentale : à chaque
+# changement, seules les annonces insérées / modifiées depuis la dernière synchronisation
+# (index sur updated_at) sont lues dans SQLite. La copie complète n'a lieu qu'une fois.
+# Sans DuckDB, les mêmes requêtes partent sur la base SQLite (listings.ListingsDB).
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+from listings import COLUMNS, INDEXED
+
+BASE_DIR = Path(__file__).resolve().parent
+ANALYTICS_PATH = BASE_DIR / "Data" / "listings.duckdb"
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS listings (
+        annonce BIGINT PRIMARY KEY,
+        category VARCHAR,
+        marque VARCHAR,
+        modele VARCHAR,
+        annee BIGINT,
+        prix BIGINT,
+        kilometrage BIGINT,
+        boite VARCHAR,
+        carburant VARCHAR,
+        adresse VARCHAR,
+        proprietaire VARCHAR,
+        url VARCHAR,
+        source VARCHAR,
+        first_seen DOUBLE,
+        updated_at DOUBLE
+    )"""
+SYNCED = ["annonce", *COLUMNS, "first_seen", "updated_at"]
+
+
+class Analytics:
+
+    def __init__(self, listings, path=ANALYTICS_PATH):
+        self.listings = listings
+        self._lock = threading.Lock()
+        self._synced = None   # updated_at de la dernière annonce copiée
+        self._con = None
+        if duckdb is not None:
+            try:
+                self._con = duckdb.connect(str(path))
+            except duckdb.IOException:
+                # fichier déjà ouvert par un autre processus : copie en mémoire
+                logging.warning(f"{path} occupé : copie DuckDB en mémoire")
+                self._con = duckdb.connect()
+            self._con.execute(SCHEMA)
+            self._synced = self._con.execute("SELECT MAX(updated_at) FROM listings").fetchone()[0]
+
+    @property
+    def engine(self):
+        return "duckdb" if self._con is not None else "sqlite"
+
+    def refresh(self):
+        # copie des annonces modifiées depuis la dernière synchronisation
+        version = self.listings.version()
+        if version == self._synced:
+            return
+        if version is None or (self._synced is not None and version < self._synced):
+            # base des annonces recréée : on repart de zéro
+            self._con.execute("DELETE FROM listings")
+            self._synced = None
+            if version is None:
+                return
+        changes = self.listings.changes(self._synced)
+        if len(changes):
+            self._con.register("changes", changes)
+            self._con.execute(f"INSERT OR REPLACE INTO listings SELECT {', '.join(SYNCED)} FROM changes")
+            self._con.unregister("changes")
+            version = max(version, changes["updated_at"].max())
+        self._synced = version
+
+    def _query(self, sql, params):
+        with self._lock:
+            self.refresh()
+            return self._con.execute(sql, params).df()
+
+    def price_stats(self, type_, **filters):
+        if self._con is None:
+            return self.listings.price_stats(type_, **filters)
+        where, params = self.listings.where(type_, **filters)
+        row = self._query(f"SELECT COUNT(*) AS total, MIN(prix) AS prix_min, AVG(prix) AS prix_moyen, "
+                          f"MAX(prix) AS prix_max FROM listings WHERE {where}", params)
+        return row.iloc[0].to_dict()
+
+    def top(self, type_, column, n=5, **filters):
+        if column not in INDEXED:
+            raise ValueError(f"colonne non indexée : {column}")
+        if self._con is None:
+            return self.listings.top(type_, column, n, **filters)
+        where, params = self.listings.where(type_, **filters)
+        return self._query(f"SELECT {column}, COUNT(*) AS annonces FROM listings "
+                           f"WHERE {where} AND {column} IS NOT NULL GROUP BY {column} "
+                           f"ORDER BY annonces DESC, {column} LIMIT ?", [*params, n])
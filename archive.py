@@ -0,0 +1,87 @@
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import json
+import gzip
+import threading
+import time
+import os
+
+from scraper import CATEGORIES, category_of, extract_records, open_sinks, collect
+
+# Archive des pages HTML brutes, adressée par contenu :
+#   archive/objects/ab/abcdef....html.gz   (une page identique n'est stockée qu'une fois)
+#   archive/index.jsonl                    (url, horodatage, statut, sha256 ; ajout seulement)
+BASE_DIR = Path(__file__).resolve().parent
+ARCHIVE_DIR = BASE_DIR / "archive"
+
+
+class HtmlArchive:
+
+    def __init__(self, root=ARCHIVE_DIR):
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.index_path = self.root / "index.jsonl"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def object_path(self, digest):
+        return self.objects / digest[:2] / f"{digest}.html.gz"
+
+    def store(self, url, text, status=200):
+        body = text.encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()
+        path = self.object_path(digest)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with gzip.open(tmp, "wb", compresslevel=6) as f:
+                f.write(body)
+            os.replace(tmp, path)
+
+        entry = {"url": url, "timestamp": time.time(), "status": status, "sha256": digest}
+        with self._lock, open(self.index_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        return digest
+
+    def load(self, digest):
+        with gzip.open(self.object_path(digest), "rb") as f:
+            return f.read().decode("utf-8")
+
+    def entries(self, latest=True):
+        # latest=True : seulement la dernière version de chaque URL
+        if not self.index_path.exists():
+            return []
+        with open(self.index_path, encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+        if latest:
+            entries = list({e["url"]: e for e in entries}.values())
+        return entries
+
+    def __len__(self):
+        return len(self.entries())
+
+
+# ================= REJEU HORS LIGNE =================
+def _replay_entry(root, entry):
+    type_ = category_of(entry["url"])
+    html = HtmlArchive(root).load(entry["sha256"])
+    return type_, extract_records(html, type_)
+
+def replay(archive=None, types=None, workers=None, sinks=None, on_page=None):
+    # ré-extraction des pages archivées (toutes catégories ou `types`), sans réseau
+    archive = archive or HtmlArchive()
+    types = set(types or CATEGORIES)
+    entries = [e for e in archive.entries() if e["status"] == 200 and category_of(e["url"]) in types]
+    # ordre stable : catégorie puis numéro de page
+    entries.sort(key=lambda e: (category_of(e["url"]), e["url"].rsplit("=", 1)[-1].zfill(6)))
+    sinks = open_sinks([(category_of(e["url"]), None) for e in entries], sinks)
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        results = pool.map(_replay_entry, [archive.root] * len(entries), entries, chunksize=16)
+        for done, (type_, records) in enumerate(results, 1):
+            sinks[type_].write(records)
+            if on_page:
+                on_page(done, len(entries))
+
+    return collect(sinks)
@@ -0,0 +1,129 @@
+import argparse
+import time
+
+import scraper
+from scraper import ANNONCE_RE, CATEGORIES, CONTAINER_CLASSES, DEFAULT_PARSER, PLANS, build_record, make_soup, parse_listing
+from fixture_server import synthetic_page, start_server
+
+# Benchmark du parsing des pages d'annonces et du crawl complet, hors réseau.
+# Usage : python bench_scraper.py [--pages 50] [--cards 20] [--html type:page1.html ...]
+#         python bench_scraper.py --server [--latency 0.05] [--workers 8]
+
+# ================= EXTRACTION D'ORIGINE (référence) =================
+# get_text + find/find_all successifs : plusieurs parcours de chaque carte
+def legacy_card(c, type_):
+    title = c.find("h2").text.split()
+    txt = c.get_text(" ", strip=True)
+    proprietaire = txt.split("Par ")[1].split("Appeler")[0].strip().title() if "Par " in txt else "Inconnu"
+    adresse_tag = c.find("div", class_="col-12 entry-zone-address")
+    lien = c.find("a", href=ANNONCE_RE)
+    record = {
+        "marque": title[0],
+        "annee": int(title[-1]),
+        "prix": int(c.find("h3").text.replace(" F CFA", "").replace("\u202f", "")),
+        "adresse": adresse_tag.text.strip() if adresse_tag else None,
+    }
+    if type_ in ("vehicle", "moto"):
+        infos = c.find_all("li")
+        record["kilometrage"] = int(infos[1].text.replace(" km", "").replace("\u202f", ""))
+        if type_ == "vehicle":
+            record["boite"] = infos[2].text
+            record["carburant"] = infos[3].text
+        record["proprietaire"] = proprietaire
+    else:
+        proprietaire_tag = c.find("span", class_="owner")
+        record["proprietaire"] = proprietaire_tag.text.strip() if proprietaire_tag else "Inconnu"
+    record["url"] = lien["href"] if lien else None
+    return record
+
+
+# ================= MESURES =================
+def bench(pages, fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = sum(len(fn(html, type_)) for type_, html in pages)
+        best = min(best, time.perf_counter() - start)
+    return best, rows
+
+def bench_parsers(pages):
+    modes = [("html.parser, arbre complet", "html.parser", False),
+             ("html.parser, blocs d'annonces", "html.parser", True)]
+    if DEFAULT_PARSER == "lxml":
+        modes += [("lxml, arbre complet", "lxml", False),
+                  ("lxml, blocs d'annonces", "lxml", True)]
+
+    reference = [parse_listing(html, type_, "html.parser", False) for type_, html in pages]
+    base = None
+    for label, parser, strain in modes:
+        # même résultat que le parseur d'origine
+        assert all(parse_listing(html, type_, parser, strain).equals(ref)
+                   for (type_, html), ref in zip(pages, reference)), label
+        t, rows = bench(pages, lambda html, type_: parse_listing(html, type_, parser, strain))
+        base = base or t
+        print(f"{label:<32} {t / len(pages) * 1000:8.2f} ms/page  x{base / t:.1f}  ({rows} annonces)")
+
+def bench_extraction(pages, repeat=5):
+    # coût par carte, arbre déjà construit : extraction d'origine vs plan compilé
+    cards = [(type_, c) for type_, html in pages
+             for c in make_soup(html, type_).find_all("div", class_=CONTAINER_CLASSES[type_])]
+    assert all(legacy_card(c, type_) == build_record(type_, *PLANS[type_].collect(c)) for type_, c in cards)
+
+    base = None
+    for label, fn in [("extraction d'origine", legacy_card),
+                      ("plan compilé", lambda c, type_: build_record(type_, *PLANS[type_].collect(c)))]:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for type_, c in cards:
+                fn(c, type_)
+            best = min(best, time.perf_counter() - start)
+        base = base or best
+        print(f"{label:<32} {best / len(cards) * 1e6:8.1f} µs/carte  x{base / best:.1f}")
+
+def bench_crawl(pages, workers, latency, error_rate, rps):
+    # téléchargement + parsing contre le serveur local (fixture_server.py)
+    server = start_server(latency=latency, error_rate=error_rate, rps=rps)
+    scraper.BASE_URL = server.base_url
+    jobs = [(type_, p) for p in range(1, pages + 1) for type_ in CATEGORIES]
+    try:
+        for label, run in [("séquentiel", lambda: scraper.scrape_pages(jobs, 1)),
+                           (f"threads x{workers}", lambda: scraper.scrape_pages(jobs, workers)),
+                           (f"pipeline x{workers}", lambda: scraper.scrape_pipeline(jobs, workers))]:
+            start = time.perf_counter()
+            rows = sum(len(df) for df in run().values())
+            elapsed = time.perf_counter() - start
+            print(f"{label:<32} {len(jobs) / elapsed:8.1f} pages/s  ({rows} annonces)")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark du parsing des pages dakar-auto")
+    parser.add_argument("--pages", type=int, default=30, help="pages synthétiques par catégorie")
+    parser.add_argument("--cards", type=int, default=20, help="annonces par page")
+    parser.add_argument("--html", nargs="*", default=[], help="pages réelles enregistrées (type:fichier)")
+    parser.add_argument("--server", action="store_true", help="mesurer téléchargement + parsing via le serveur local")
+    parser.add_argument("--workers", type=int, default=scraper.DEFAULT_WORKERS)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rps", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.server:
+        bench_crawl(args.pages, args.workers, args.latency, args.error_rate, args.rps)
+        raise SystemExit
+
+    if args.html:
+        pages = []
+        for item in args.html:
+            type_, path = item.split(":", 1)
+            with open(path, encoding="utf-8") as f:
+                pages.append((type_, f.read()))
+    else:
+        pages = [(type_, synthetic_page(type_, p, args.cards)) for type_ in CATEGORIES for p in range(1, args.pages + 1)]
+
+    print(f"{len(pages)} pages, parseur par défaut : {DEFAULT_PARSER}\n")
+    bench_parsers(pages)
+    print()
+    bench_extraction(pages)
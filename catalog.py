@@ -0,0 +1,223 @@
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import Manager
+import shutil
+import queue
+import time
+import re
+import os
+
+import scraper
+from scraper import CATEGORIES, DEFAULT_WORKERS, crawl_category, extract_records, fetch, make_session, page_url
+from storage import RecordSink
+from http_cache import HttpCache
+from throttle import Throttle, DEFAULT_RATE, backoff_delay
+from archive import HtmlArchive
+from frontier import Frontier
+from jobs import JobCancelled
+
+# Crawl du catalogue complet : découverte de la dernière page de chaque catégorie,
+# découpage en tranches (shards) crawlées dans des processus séparés, puis fusion.
+
+PAGE_RE = re.compile(r"[?&]page=(\d+)")
+MAX_PROBE = 100000
+PROBE_ATTEMPTS = 3
+PROGRESS_INTERVAL = 0.5     # secondes entre deux remontées de progression des shards
+
+
+class LastPageUnknown(Exception):
+    pass
+
+
+# ================= DERNIERE PAGE =================
+def pagination_last_page(html):
+    # plus grand numéro présent dans les liens de pagination
+    pages = [int(p) for p in PAGE_RE.findall(html)]
+    return max(pages) if pages else None
+
+def discover_last_page(type_, session=None, cache=None, throttle=None):
+    def probe(page):
+        # un échec de téléchargement n'est pas une page vide : on réessaie, puis on abandonne
+        # (une dernière page fausse tronquerait le catalogue sans le dire)
+        for attempt in range(PROBE_ATTEMPTS):
+            html = fetch(page_url(type_, page), session, cache, throttle)
+            if html:
+                return html
+            time.sleep(backoff_delay(attempt))
+        raise LastPageUnknown(f"{CATEGORIES[type_]} : page {page} inaccessible, dernière page inconnue")
+
+    def has_cards(page):
+        return bool(extract_records(probe(page), type_))
+
+    first = probe(1)
+    if not extract_records(first, type_):
+        return 0
+
+    # 1) la pagination donne souvent directement la réponse
+    guess = pagination_last_page(first) or 1
+    if guess > 1 and has_cards(guess):
+        if not has_cards(guess + 1):
+            return guess
+        low, high = guess + 1, (guess + 1) * 2
+    elif guess > 1:
+        low, high = 1, guess
+    else:
+        low, high = 1, 2
+
+    # 2) sinon : recherche exponentielle d'une page vide, puis dichotomie
+    while has_cards(high):
+        low, high = high, high * 2
+        if high > MAX_PROBE:
+            return low
+    while high - low > 1:
+        middle = (low + high) // 2
+        if has_cards(middle):
+            low = middle
+        else:
+            high = middle
+    return low
+
+
+# ================= SHARDS =================
+def shard_pages(last_page, shards):
+    # tranches contiguës [début, fin] de tailles équilibrées
+    shards = max(1, min(shards, last_page))
+    size, extra = divmod(last_page, shards)
+    ranges, start = [], 1
+    for i in range(shards):
+        end = start + size + (1 if i < extra else 0) - 1
+        ranges.append((start, end))
+        start = end + 1
+    return ranges
+
+def shard_crawl_id(type_, first_page, last_page):
+    # identifiant d'un shard dans la frontière : ses pages y sont suivies comme un crawl à part
+    return f"catalog/{type_}#{first_page}-{last_page}"
+
+def shard_ranges(crawls):
+    # tranches d'un catalogue à partir des identifiants de ses shards
+    return sorted(tuple(int(p) for p in crawl.rsplit("#", 1)[1].split("-")) for crawl in crawls)
+
+def processed(frontier, crawls):
+    # (état, (pages, annonces)) de tous les shards
+    if frontier is None:
+        return []
+    return [item for crawl in crawls for item in frontier.status(crawl).items()]
+
+def catalog_complete(frontier, type_):
+    # toutes les pages des shards traitées sans échec, fin du catalogue confirmée par une page vide ;
+    # sinon (échecs, dernière page mal découverte) les annonces absentes n'ont pas forcément disparu
+    crawls = frontier.crawls(f"catalog/{type_}#") if frontier is not None else []
+    return (bool(crawls) and not any(frontier.unfinished(crawl) for crawl in crawls)
+            and any("end" in frontier.status(crawl) for crawl in crawls))
+
+def crawl_shard(type_, first_page, last_page, out_path, workers, throttle_options, base_url, cache_path=None,
+                archive_root=None, progress=None, cancel=None, frontier_path=None):
+    # exécuté dans un processus : session, cache et archive propres au processus.
+    # progress (file partagée) reçoit chaque page traitée, cancel (événement partagé) arrête le shard.
+    # frontier_path : état des pages du shard enregistré, un shard interrompu reprend là où il s'est arrêté
+    scraper.BASE_URL = base_url
+    session = make_session(pool_size=workers)
+    cache = HttpCache(cache_path) if cache_path else None
+    archive = HtmlArchive(archive_root) if archive_root else None
+    frontier = Frontier(frontier_path) if frontier_path else None
+    crawl = shard_crawl_id(type_, first_page, last_page)
+
+    def on_page(page, _):
+        if cancel is not None and cancel.is_set():
+            raise JobCancelled()
+        if progress is not None:
+            progress.put(1)
+
+    # reprise : le fichier du shard est complété au lieu d'être remplacé
+    sink = RecordSink(out_path, append=frontier is not None and bool(frontier.status(crawl)))
+    try:
+        crawl_category(type_, last_page, workers=workers, session=session, cache=cache,
+                       throttle=Throttle(**throttle_options), archive=archive, on_page=on_page, sink=sink,
+                       first_page=first_page, frontier=frontier, crawl=crawl)
+    finally:
+        sink.close()
+    return out_path, sink.count
+
+def merge_csv(parts, out_path):
+    # concaténation des shards dans l'ordre, un seul en-tête
+    out_path = Path(out_path)
+    with open(out_path, "w", encoding="utf-8", newline="") as out:
+        header_written = False
+        for part in parts:
+            part = Path(part)
+            if not part.exists():
+                continue
+            with open(part, encoding="utf-8", newline="") as f:
+                header = f.readline()
+                if not header_written:
+                    out.write(header)
+                    header_written = True
+                shutil.copyfileobj(f, out)
+    return out_path
+
+def crawl_catalog(type_, out_dir, last_page=None, shards=None, workers=DEFAULT_WORKERS, rate=DEFAULT_RATE,
+                  cache_path=None, archive_root=None, on_page=None, session=None, throttle=None, frontier=None):
+    # on_page(pages traitées, pages au total) : appelé régulièrement pendant le crawl ; s'il lève
+    # une exception (annulation de la tâche), les shards s'arrêtent à leur page suivante.
+    # session / throttle : ceux du scraping, pour la découverte de la dernière page
+    # frontier : un catalogue interrompu est repris avec ses tranches d'origine au lieu d'être recommencé
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    crawls = frontier.crawls(f"catalog/{type_}#") if frontier is not None else []
+    if any(frontier.unfinished(crawl) for crawl in crawls):
+        ranges = shard_ranges(crawls)
+    else:
+        for crawl in crawls:
+            frontier.reset(crawl)
+        last_page = last_page or discover_last_page(type_, session, throttle=throttle)
+        if not last_page:
+            return out_dir / f"{type_}.csv", 0
+        ranges = shard_pages(last_page, shards or os.cpu_count() or 1)
+        # le dernier shard demande aussi la page suivante : sa page vide confirme la fin du catalogue
+        ranges[-1] = (ranges[-1][0], last_page + 1)
+        crawls = [shard_crawl_id(type_, start, end) for start, end in ranges]
+    total = ranges[-1][1] - ranges[0][0] + 1
+
+    parts = [out_dir / f"{type_}_shard{i:02d}.csv" for i in range(len(ranges))]
+    # le débit global reste celui demandé : il est partagé entre les shards
+    options = dict(throttle.options) if throttle is not None else {}
+    options["rate"] = (options.get("rate") or rate) / len(ranges)
+
+    # reprise : les pages déjà traitées comptent dans la progression
+    done = sum(pages for state, (pages, _) in processed(frontier, crawls) if state in ("done", "end", "skipped"))
+    rows = 0
+    with Manager() as manager:
+        progress, cancel = manager.Queue(), manager.Event()
+        pool = ProcessPoolExecutor(max_workers=len(ranges))
+        try:
+            pending = {pool.submit(crawl_shard, type_, start, end, part, workers, options, scraper.BASE_URL,
+                                   cache_path, archive_root, progress, cancel,
+                                   frontier.path if frontier is not None else None)
+                       for (start, end), part in zip(ranges, parts)}
+            while pending:
+                finished, pending = wait(pending, timeout=PROGRESS_INTERVAL)
+                for future in finished:
+                    rows += future.result()[1]
+                while True:
+                    try:
+                        done += progress.get_nowait()
+                    except queue.Empty:
+                        break
+                if on_page:
+                    on_page(done, total)
+        except BaseException:
+            cancel.set()
+            raise
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    merged = merge_csv(parts, out_dir / f"{type_}.csv")
+    if frontier is not None:
+        rows = sum(records for _, (_, records) in processed(frontier, crawls))
+        if any(frontier.unfinished(crawl) for crawl in crawls):
+            # pages en échec : les shards sont gardés, le prochain crawl du catalogue les complète
+            return merged, rows
+    for part in parts:
+        part.unlink(missing_ok=True)
+    return merged, rows
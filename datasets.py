@@ -0,0 +1,256 @@
+from pathlib import Path
+import threading
+import logging
+import csv
+import re
+import os
+
+import pandas as pd
+
+from dedup import drop_duplicate_annonces
+
+# Jeux de données des dashboards : chaque CSV de Data/ est nettoyé une seule fois puis
+# enregistré en Feather typé (prix entiers, années sur 16 bits, marques catégorielles).
+# Les dashboards lisent ce fichier ; le CSV ne sert plus qu'à l'export.
+# Le fichier typé est reconstruit dès que le CSV source est plus récent.
+# Feather non compressé = format Arrow IPC : ouvert par memory map, en lecture seule, les
+# colonnes numériques ne sont pas copiées et tous les processus partagent le cache disque.
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    feather = None
+
+BASE_DIR = Path(__file__).resolve().parent
+DATA_DIR = BASE_DIR / "Data"
+TYPED_DIR = DATA_DIR / "typed"
+
+SOURCES = {"moto": "Moto.csv", "location": "Location.csv", "vehicle": "Vehicule.csv"}
+CATEGORICAL = ["Marque1", "Modele", "Ville"]
+
+# Exports Web Scraper cassés, normalisés une fois en CSV canonique (UTF-8, une colonne par champ)
+CANONICAL = {"vehicle": "Vehicule.normalise.csv"}
+VEHICULE_COLUMNS = ["web_scraper_order", "web_scraper_start_url", "URL", "MARQUE", "ANNEE", "PRIX", "ADRESSE",
+                    "KILOMETRAGE", "BOITE", "CARBURANT", "PROPRIETAIRE"]
+ANNEE_FIELD_RE = re.compile(r"^Ann\S{1,2}e\s*:")
+
+
+def tmp_path(path):
+    # fichier temporaire propre au processus / thread : deux sessions qui régénèrent le même
+    # fichier en même temps écrivent chacune le leur, le dernier remplacement atomique gagne
+    return path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+# ================= NORMALISATION =================
+def decode_line(raw):
+    # export en Latin-1 (cp1252) : "Ann\xe9e" ; on accepte aussi les lignes déjà en UTF-8
+    try:
+        return raw.decode("utf-8")
+    except UnicodeDecodeError:
+        return raw.decode("cp1252", errors="replace")
+
+def split_vehicule_row(fields):
+    # [ordre + URL de départ collés, URL annonce, MARQUE (peut contenir des virgules),
+    #  ANNEE, PRIX, ADRESSE, KILOMETRAGE, BOITE, CARBURANT, PROPRIETAIRE]
+    order, _, start_url = fields[0].rstrip('"').partition(",")
+    rest = fields[1:]
+    i = next((i for i, f in enumerate(rest) if ANNEE_FIELD_RE.match(f)), len(rest) - 7)
+    i = max(i, 2)
+    marque = ",".join(rest[1:i])
+    tail = rest[i:i + 6] + [",".join(rest[i + 6:])]
+    tail += [""] * (7 - len(tail))
+    return [order, start_url, rest[0], marque, *tail]
+
+def normalize_vehicule(src, dst):
+    # lecture ligne à ligne (pas de chargement du fichier entier), écriture atomique
+    dst = Path(dst)
+    tmp = tmp_path(dst)
+    rows = repaired = 0
+    with open(src, "rb") as raw, open(tmp, "w", encoding="utf-8", newline="") as out:
+        reader = csv.reader(decode_line(line) for line in raw)
+        writer = csv.writer(out)
+        next(reader, None)   # en-tête d'origine, décalé d'une colonne
+        writer.writerow(VEHICULE_COLUMNS)
+        for fields in reader:
+            if not fields:
+                continue
+            row = split_vehicule_row(fields)
+            row[4] = row[4].replace("\ufffd", "\u00e9")
+            repaired += len(fields) != 10
+            writer.writerow(row)
+            rows += 1
+    tmp.replace(dst)
+    return rows, repaired
+
+NORMALIZERS = {"vehicle": normalize_vehicule}
+
+def source_path(type_):
+    # CSV à lire pour une catégorie ; un export cassé est normalisé une seule fois
+    raw = DATA_DIR / SOURCES[type_]
+    if type_ not in CANONICAL:
+        return raw
+    canonical = DATA_DIR / CANONICAL[type_]
+    if not canonical.exists() or canonical.stat().st_mtime < raw.stat().st_mtime:
+        rows, repaired = NORMALIZERS[type_](raw, canonical)
+        logging.warning(f"{raw.name} normalisé -> {canonical.name} ({rows} lignes, {repaired} réparées)")
+    return canonical
+
+
+# ================= NETTOYAGE =================
+def split_marque(df, ville=True):
+    # "Toyota Corolla 2015 Dakar" -> marque, modèle, (ville = dernier mot)
+    parts = df['MARQUE'].map(lambda v: str(v).split() if pd.notna(v) else [])
+    df['Marque1'] = parts.str[0]
+    df['Modele'] = parts.str[1]
+    if ville:
+        df['Ville'] = parts.str[-1].where(parts.str.len() >= 3)
+
+def digits(series):
+    return pd.to_numeric(series.astype(str).str.replace(r'[^\d]', '', regex=True), errors='coerce')
+
+def annee(series):
+    # "2015" ou "Année: 2015"
+    return pd.to_numeric(series.astype(str).str.extract(r'((?:19|20)\d{2})', expand=False), errors='coerce')
+
+def without_outliers(df, column):
+    # suppression des valeurs extrêmes (> 3 écarts-types)
+    mean, std = df[column].mean(), df[column].std()
+    return df[(df[column] <= mean + 3*std) & (df[column] >= mean - 3*std)]
+
+def clean_moto(df):
+    df = df.copy()
+    split_marque(df)
+    df['ANNEE1'] = annee(df['ANNEE'])
+    df['KILOMETRAGE'] = digits(df['KILOMETRAGE'])
+    df['PRIX1'] = digits(df['PRIX'])
+
+    df = without_outliers(df, 'PRIX1')
+    df = without_outliers(df, 'KILOMETRAGE')
+    # valeurs manquantes remplacées par la médiane
+    df['PRIX1'] = df['PRIX1'].fillna(df['PRIX1'].median())
+    df['KILOMETRAGE'] = df['KILOMETRAGE'].fillna(df['KILOMETRAGE'].median())
+
+    df = df.dropna(subset=['Marque1', 'Modele', 'PRIX1'])
+    return drop_duplicate_annonces(df, fallback=['Marque1', 'Modele', 'ANNEE1', 'PRIX1'])
+
+def clean_location(df):
+    df = df.copy()
+    split_marque(df, ville=False)
+    df['ANNEE1'] = annee(df['ANNEE'])
+    df['PRIX1'] = digits(df['PRIX'])
+
+    # valeurs impossibles pour une location, puis 3 écarts-types
+    min_prix, max_prix = 10000, 250000
+    mean, std = df['PRIX1'].mean(), df['PRIX1'].std()
+    df = df[(df['PRIX1'] >= min_prix) & (df['PRIX1'] <= max_prix)]
+    df = df[(df['PRIX1'] <= mean + 3*std) & (df['PRIX1'] >= mean - 3*std)]
+    df['PRIX1'] = df['PRIX1'].fillna(df['PRIX1'].median())
+
+    df = df.dropna(subset=['Marque1', 'Modele', 'PRIX1'])
+    df = drop_duplicate_annonces(df, fallback=['Marque1', 'Modele', 'ANNEE1', 'PRIX1'])
+    df['Ville'] = df['ADRESSE'] if 'ADRESSE' in df.columns else None
+    return df
+
+def clean_vehicule(df):
+    df = df.copy()
+    split_marque(df)
+    df['ANNEE1'] = annee(df['ANNEE'])
+    df['KILOMETRAGE'] = digits(df['KILOMETRAGE']) if 'KILOMETRAGE' in df.columns else None
+    df['PRIX1'] = digits(df['PRIX'])
+
+    df = df[df['PRIX1'] > 0]
+    df = df[df['KILOMETRAGE'] > 0]
+    df = without_outliers(df, 'PRIX1')
+    df = without_outliers(df, 'KILOMETRAGE')
+    df['PRIX1'] = df['PRIX1'].fillna(df['PRIX1'].median())
+    df['KILOMETRAGE'] = df['KILOMETRAGE'].fillna(df['KILOMETRAGE'].median())
+
+    df = df.dropna(subset=['Marque1', 'Modele', 'PRIX1'])
+    return drop_duplicate_annonces(df, fallback=['Marque1', 'Modele', 'ANNEE1', 'PRIX1'])
+
+CLEANERS = {"moto": clean_moto, "location": clean_location, "vehicle": clean_vehicule}
+
+
+# ================= TYPAGE =================
+def to_typed(df):
+    # types compacts : lecture directe, sans inférence ni conversion
+    df = df.reset_index(drop=True)
+    df['PRIX1'] = df['PRIX1'].round().astype('int64')
+    df['ANNEE1'] = df['ANNEE1'].round().astype('Int16')
+    if 'KILOMETRAGE' in df.columns:
+        df['KILOMETRAGE'] = pd.to_numeric(df['KILOMETRAGE'], errors='coerce').round().astype('Int64')
+    for column in CATEGORICAL:
+        if column in df.columns:
+            df[column] = df[column].astype('category')
+    for column in df.columns:
+        if df[column].dtype == object:
+            df[column] = df[column].astype('string')
+    return df
+
+def read_source(type_):
+    df = pd.read_csv(source_path(type_))
+    df.columns = df.columns.str.strip()
+    return df
+
+def enrich_source(type_, fill):
+    # complète le CSV lu par les dashboards ; fill(df) -> (df, statistiques), voir enrich.enrich.
+    # Lu en texte : les autres colonnes sont réécrites à l'identique.
+    path = source_path(type_)
+    df = pd.read_csv(path, dtype=str, keep_default_na=False, encoding="utf-8-sig")
+    df, stats = fill(df)
+    if stats["filled"]:
+        tmp = tmp_path(path)
+        df.to_csv(tmp, index=False)
+        tmp.replace(path)   # plus récent que le Feather typé : ré-ingestion au prochain chargement
+    return df, stats
+
+
+# ================= INGESTION =================
+def typed_path(type_):
+    return TYPED_DIR / (Path(SOURCES[type_]).stem + ".feather")
+
+def is_stale(type_):
+    source, typed = source_path(type_), typed_path(type_)
+    return not typed.exists() or typed.stat().st_mtime < source.stat().st_mtime
+
+def ingest(type_):
+    # CSV source -> nettoyage -> Feather typé ; renvoie le DataFrame
+    df = to_typed(CLEANERS[type_](read_source(type_)))
+    if feather is None:
+        return df
+    TYPED_DIR.mkdir(parents=True, exist_ok=True)
+    path = typed_path(type_)
+    # écriture atomique : un lecteur ne voit jamais un fichier à moitié écrit
+    tmp = tmp_path(path)
+    feather.write_feather(df, str(tmp), compression="uncompressed")
+    tmp.replace(path)   # les lecteurs qui ont déjà mappé l'ancien fichier le gardent
+    return df
+
+def exists(type_):
+    return (DATA_DIR / SOURCES[type_]).exists()
+
+def version(type_):
+    # change quand le CSV source (ou sa version normalisée, complétée) change (clé de cache)
+    return source_path(type_).stat().st_mtime_ns
+
+def open_table(type_):
+    # table Arrow adossée au fichier mappé en mémoire
+    if is_stale(type_):
+        ingest(type_)
+    return pa.ipc.open_file(pa.memory_map(str(typed_path(type_)), "r")).read_all()
+
+def load(type_):
+    # jeu nettoyé et typé ; ré-ingéré seulement si le CSV a changé.
+    # Le DataFrame renvoyé est en lecture seule (tableaux numériques mappés sur le fichier).
+    if feather is None:
+        logging.warning("pyarrow absent : nettoyage du CSV à chaque chargement")
+        return ingest(type_)
+    return open_table(type_).to_pandas(split_blocks=True)
+
+def ingest_all(force=False):
+    return {type_: len(ingest(type_)) for type_ in SOURCES if exists(type_) and (force or is_stale(type_))}
+
+
+if __name__ == "__main__":
+    for type_, rows in ingest_all(force=True).items():
+        print(f"{SOURCES[type_]} -> {typed_path(type_)} ({rows} lignes)")
@@ -0,0 +1,110 @@
+from pathlib import Path
+from array import array
+import pandas as pd
+import threading
+
+from scraper import ANNONCE_RE, annonce_id
+
+# Index persistant des annonces déjà ingérées (tous les scrapings passés).
+# Sur disque : identifiants uint32 ajoutés à la suite (4 octets par annonce).
+BASE_DIR = Path(__file__).resolve().parent
+INDEX_PATH = BASE_DIR / ".cache" / "annonce_ids.bin"
+
+URL_COLUMNS = ["url", "URL", "annonce_link", "web_scraper_start_url"]
+
+
+class AnnonceIndex:
+
+    def __init__(self, path=INDEX_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        ids = array("I")
+        if self.path.exists():
+            with open(self.path, "rb") as f:
+                ids.frombytes(f.read())
+        self._ids = set(ids)
+
+    def __contains__(self, id_):
+        return id_ in self._ids
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, ids):
+        # renvoie les identifiants réellement nouveaux (vérification + ajout atomiques)
+        with self._lock:
+            new = [i for i in dict.fromkeys(ids) if i is not None and i not in self._ids]
+            if new:
+                self._ids.update(new)
+                with open(self.path, "ab") as f:
+                    f.write(array("I", new).tobytes())
+        return new
+
+    def commit(self, records, key="url"):
+        # annonces écrites sur disque -> index
+        return self.add(annonce_id(record.get(key)) for record in records)
+
+    def reserve(self):
+        # annonces retenues par un scraping (voir Reservation)
+        return Reservation(self)
+
+    def bootstrap(self, paths):
+        # premier remplissage à partir des CSV existants (Data/ et exports)
+        ids = []
+        for path in paths:
+            try:
+                with open(path, encoding="utf-8", errors="replace") as f:
+                    for line in f:
+                        ids.extend(int(i) for i in ANNONCE_RE.findall(line))
+            except OSError:
+                continue
+        return len(self.add(ids))
+
+
+class Reservation:
+    # Annonces retenues pendant un scraping : écartées tout de suite des pages suivantes,
+    # mais ajoutées à l'index seulement une fois écrites sur disque (commit). Un scraping
+    # annulé ou en erreur ne fait donc pas disparaître les annonces qu'il n'a pas écrites.
+
+    def __init__(self, index):
+        self.index = index
+        self.ids = set()
+        self._lock = threading.Lock()
+
+    def __contains__(self, id_):
+        return id_ in self.index or id_ in self.ids
+
+    def claim(self, records, key="url"):
+        # garde les annonces jamais vues (ni dans l'index, ni plus tôt dans ce scraping) ;
+        # sans identifiant, on garde
+        with self._lock:
+            kept = []
+            for record in records:
+                id_ = annonce_id(record.get(key))
+                if id_ is None:
+                    kept.append(record)
+                elif id_ not in self.index and id_ not in self.ids:
+                    self.ids.add(id_)
+                    kept.append(record)
+        return kept
+
+    def commit(self, records, key="url"):
+        # annonces écrites sur disque -> index persistant
+        return self.index.commit(records, key)
+
+
+def drop_duplicate_annonces(df, fallback=None):
+    # doublons par identifiant d'annonce (et non par marque/modèle/année/prix, qui
+    # supprime des annonces distinctes) ; `fallback` pour les lignes sans identifiant
+    column = next((c for c in URL_COLUMNS if c in df.columns), None)
+    if column is None:
+        return df.drop_duplicates(subset=fallback) if fallback else df
+
+    ids = df[column].astype(str).str.extract(ANNONCE_RE, expand=False)
+    with_id = ids.notna()
+    kept = df[with_id][~ids[with_id].duplicated()]
+    without_id = df[~with_id]
+    if fallback:
+        without_id = without_id.drop_duplicates(subset=fallback)
+    return pd.concat([kept, without_id]).sort_index()
@@ -0,0 +1,182 @@
+from pathlib import Path
+import sqlite3
+import threading
+import json
+import time
+
+import pandas as pd
+
+from scraper import annonce_id
+
+# Historique des annonces (change data capture) : au lieu de garder des snapshots complets,
+# on compare chaque annonce scrapée à son dernier état connu et on ne stocke que
+#   insert -> annonce nouvelle (ou réapparue), avec l'annonce complète
+#   update -> prix ou kilométrage modifié
+#   delete -> annonce disparue d'un crawl complet de sa catégorie
+# Les snapshots passés et les baisses de prix se reconstruisent à partir de ces événements.
+BASE_DIR = Path(__file__).resolve().parent
+DELTA_PATH = BASE_DIR / ".cache" / "deltas.sqlite"
+
+TRACKED = ("prix", "kilometrage")
+
+
+def _same(a, b):
+    # NaN / None : valeurs absentes considérées égales
+    if a is None or a != a:
+        return b is None or b != b
+    return a == b
+
+
+class DeltaStore:
+
+    def __init__(self, path=DELTA_PATH):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS current (
+                category TEXT,
+                annonce INTEGER,
+                prix INTEGER,
+                kilometrage INTEGER,
+                first_seen REAL,
+                last_seen REAL,
+                gone INTEGER DEFAULT 0,
+                PRIMARY KEY (category, annonce)
+            );
+            CREATE TABLE IF NOT EXISTS events (
+                category TEXT,
+                annonce INTEGER,
+                kind TEXT,
+                at REAL,
+                prix INTEGER,
+                kilometrage INTEGER,
+                record TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_events_annonce ON events(category, annonce, at);
+            CREATE INDEX IF NOT EXISTS idx_events_at ON events(kind, at);
+        """)
+        self._db.commit()
+
+    def observe(self, type_, records, at=None):
+        # compare les annonces d'une page à leur dernier état ; renvoie les compteurs
+        at = at or time.time()
+        counts = {"insert": 0, "update": 0, "unchanged": 0}
+        by_id = {}
+        for record in records:
+            id_ = annonce_id(record.get("url"))
+            if id_ is not None:
+                by_id[id_] = record
+        if not by_id:
+            return counts
+
+        with self._lock:
+            placeholders = ",".join("?" * len(by_id))
+            known = {row[0]: row[1:] for row in self._db.execute(
+                f"SELECT annonce, prix, kilometrage, gone FROM current WHERE category = ? AND annonce IN ({placeholders})",
+                (type_, *by_id))}
+
+            events, upserts = [], []
+            for id_, record in by_id.items():
+                values = [record.get(k) for k in TRACKED]
+                previous = known.get(id_)
+                if previous is None or previous[2]:
+                    events.append((type_, id_, "insert", at, *values, json.dumps(record, default=str)))
+                    counts["insert"] += 1
+                elif not all(_same(a, b) for a, b in zip(values, previous[:2])):
+                    events.append((type_, id_, "update", at, *values, None))
+                    counts["update"] += 1
+                else:
+                    counts["unchanged"] += 1
+                upserts.append((type_, id_, *values, at, at))
+
+            self._db.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?)", events)
+            self._db.executemany(
+                "INSERT INTO current (category, annonce, prix, kilometrage, first_seen, last_seen, gone) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0) ON CONFLICT (category, annonce) DO UPDATE SET "
+                "prix = excluded.prix, kilometrage = excluded.kilometrage, last_seen = excluded.last_seen, gone = 0",
+                upserts)
+            self._db.commit()
+        return counts
+
+    def sweep(self, type_, since, at=None):
+        # après un crawl complet commencé à `since` : les annonces non revues ont disparu
+        at = at or time.time()
+        with self._lock:
+            gone = self._db.execute(
+                "SELECT annonce, prix, kilometrage FROM current WHERE category = ? AND gone = 0 AND last_seen < ?",
+                (type_, since)).fetchall()
+            self._db.executemany("INSERT INTO events VALUES (?, ?, 'delete', ?, ?, ?, NULL)",
+                                 [(type_, id_, at, prix, km) for id_, prix, km in gone])
+            self._db.execute("UPDATE current SET gone = 1 WHERE category = ? AND gone = 0 AND last_seen < ?",
+                             (type_, since))
+            self._db.commit()
+        return len(gone)
+
+    def snapshot(self, type_, at=None):
+        # annonces présentes à la date `at` (maintenant par défaut), reconstruites depuis les événements
+        at = at or time.time()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT annonce, kind, prix, kilometrage, record FROM events "
+                "WHERE category = ? AND at <= ? ORDER BY annonce, at, rowid",
+                (type_, at)).fetchall()
+        state = {}
+        for id_, kind, prix, km, record in rows:
+            if kind == "insert":
+                state[id_] = json.loads(record)
+            elif kind == "update" and id_ in state:
+                state[id_].update(prix=prix, kilometrage=km)
+            elif kind == "delete":
+                state.pop(id_, None)
+        return pd.DataFrame(list(state.values()))
+
+    def price_drops(self, type_=None, since=None, min_drop=0):
+        # baisses de prix (prix précédent -> nouveau prix) depuis `since`
+        sql = """
+            SELECT * FROM (
+                SELECT category, annonce, at,
+                       LAG(prix) OVER (PARTITION BY category, annonce ORDER BY at, rowid) AS ancien_prix,
+                       prix, kind
+                FROM events WHERE kind != 'delete'
+            ) WHERE kind = 'update' AND ancien_prix - prix > ?"""
+        params = [min_drop]
+        if type_ is not None:
+            sql += " AND category = ?"
+            params.append(type_)
+        if since is not None:
+            sql += " AND at >= ?"
+            params.append(since)
+        with self._lock:
+            df = pd.read_sql_query(sql + " ORDER BY at DESC", self._db, params=params)
+        df["baisse"] = df["ancien_prix"] - df["prix"]
+        df["baisse_pct"] = (100 * df["baisse"] / df["ancien_prix"]).round(1)
+        df["date"] = pd.to_datetime(df["at"], unit="s")
+        return df.drop(columns=["kind", "at"])
+
+    def stats(self):
+        # {type d'événement: nombre}
+        with self._lock:
+            return dict(self._db.execute("SELECT kind, COUNT(*) FROM events GROUP BY kind").fetchall())
+
+
+class DeltaSink:
+    # enveloppe une sortie (RecordSink / MemorySink) : chaque lot écrit passe aussi dans l'historique
+
+    def __init__(self, store, type_, sink, at=None):
+        self.store = store
+        self.type_ = type_
+        self.sink = sink
+        self.at = at or time.time()
+        self.counts = {"insert": 0, "update": 0, "unchanged": 0}
+
+    def write(self, records):
+        records = list(records)
+        for kind, n in self.store.observe(self.type_, records, self.at).items():
+            self.counts[kind] += n
+        self.sink.write(records)
+
+    def __getattr__(self, name):
+        # flush, close, count, to_dataframe... : ceux de la sortie enveloppée
+        return getattr(self.sink, name)
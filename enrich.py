@@ -0,0 +1,170 @@
+from pathlib import Path
+import unicodedata
+import threading
+import sqlite3
+import json
+import time
+import re
+
+import pandas as pd
+from bs4 import BeautifulSoup as bs
+
+from scraper import DEFAULT_PARSER, DEFAULT_WORKERS, annonce_id, detail_url, fetch_pages
+from dedup import URL_COLUMNS
+
+# Enrichissement par les pages détail : les cartes de listing laissent des champs vides
+# (année / kilométrage des motos, boîte / carburant des locations...). On télécharge la page
+# détail des seules annonces incomplètes, une fois par annonce (résultat gardé en base),
+# puis on complète les colonnes vides.
+BASE_DIR = Path(__file__).resolve().parent
+DETAILS_PATH = BASE_DIR / ".cache" / "details.sqlite"
+
+DETAIL_FIELDS = {
+    "vehicle": ["annee", "kilometrage", "boite", "carburant"],
+    "moto": ["annee", "kilometrage"],
+    "location": ["annee", "kilometrage", "boite", "carburant"],
+}
+
+# libellé (sans accents, en minuscules) -> champ
+LABELS = [
+    ("annee", "annee"),
+    ("kilometrage", "kilometrage"),
+    ("boite", "boite"),
+    ("transmission", "boite"),
+    ("carburant", "carburant"),
+    ("energie", "carburant"),
+]
+
+YEAR_RE = re.compile(r"\b(19\d{2}|20\d{2})\b")
+
+
+# ================= PAGE DETAIL =================
+def normalize(text):
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return text.lower().strip()
+
+def convert(field, value):
+    if field == "annee":
+        match = YEAR_RE.search(value)
+        return int(match.group(1)) if match else None
+    if field == "kilometrage":
+        digits = re.sub(r"[^\d]", "", value)
+        return int(digits) if digits else None
+    return value.strip() or None
+
+def parse_detail(html):
+    # caractéristiques "Libellé : valeur" ou libellé puis valeur sur l'élément suivant
+    strings = list(bs(html, DEFAULT_PARSER).stripped_strings)
+    fields = {}
+    for i, text in enumerate(strings):
+        label, _, value = text.partition(":")
+        key = normalize(label)
+        if len(key) > 30:
+            continue
+        field = next((f for prefix, f in LABELS if key.startswith(prefix)), None)
+        if field is None or field in fields:
+            continue
+        value = value.strip() or (strings[i + 1] if i + 1 < len(strings) else "")
+        value = convert(field, value)
+        if value is not None:
+            fields[field] = value
+    return fields
+
+
+# ================= STOCKAGE =================
+class DetailStore:
+    # champs extraits de chaque page détail, par identifiant d'annonce
+
+    def __init__(self, path=DETAILS_PATH):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS details (
+                annonce INTEGER PRIMARY KEY,
+                url TEXT,
+                fields TEXT,
+                fetched_at REAL
+            )""")
+        self._db.commit()
+
+    def get_many(self, ids):
+        ids = list(ids)
+        found = {}
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                rows = self._db.execute(
+                    f"SELECT annonce, fields FROM details WHERE annonce IN ({','.join('?' * len(chunk))})", chunk)
+                found.update((id_, json.loads(fields)) for id_, fields in rows)
+        return found
+
+    def put(self, id_, url, fields):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO details VALUES (?, ?, ?, ?)",
+                             (id_, url, json.dumps(fields), time.time()))
+            self._db.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM details").fetchone()[0]
+
+
+# ================= ENRICHISSEMENT =================
+def missing(series):
+    return series.isna() | (series.astype(str).str.strip() == "")
+
+def field_columns(df, type_):
+    # colonne existante pour chaque champ (ANNEE ou annee), sinon nouvelle colonne
+    upper = sum(str(c).isupper() for c in df.columns) > len(df.columns) / 2
+    columns = {}
+    for field in DETAIL_FIELDS[type_]:
+        column = next((c for c in df.columns if normalize(str(c)) == field), None)
+        columns[field] = column or (field.upper() if upper else field)
+    return columns
+
+def enrich(df, type_, store, workers=DEFAULT_WORKERS, session=None, cache=None, throttle=None, on_page=None):
+    # -> (DataFrame complété, statistiques)
+    url_column = next((c for c in URL_COLUMNS if c in df.columns), None)
+    stats = {"incomplete": 0, "fetched": 0, "filled": 0}
+    if url_column is None or df.empty:
+        return df, stats
+
+    df = df.copy()
+    columns = field_columns(df, type_)
+    for column in columns.values():
+        df[column] = df[column].astype(object) if column in df.columns else None
+    incomplete = pd.concat([missing(df[c]) for c in columns.values()], axis=1).any(axis=1)
+    stats["incomplete"] = int(incomplete.sum())
+
+    # une seule page détail par annonce, jamais re-téléchargée
+    urls = {}
+    for url in df.loc[incomplete, url_column].dropna().astype(str):
+        id_ = annonce_id(url)
+        if id_ is not None:
+            urls.setdefault(id_, url)
+    known = store.get_many(urls)
+    todo = [(id_, url) for id_, url in urls.items() if id_ not in known]
+
+    htmls = fetch_pages((detail_url(url) for _, url in todo), workers, session, cache, throttle)
+    for i, ((id_, url), html) in enumerate(zip(todo, htmls), 1):
+        # échec réseau ou page d'erreur (404, 503... : fetch renvoie "") : rien n'est enregistré,
+        # l'annonce sera retentée au prochain passage
+        if html:
+            known[id_] = parse_detail(html)
+            store.put(id_, url, known[id_])
+            stats["fetched"] += 1
+        if on_page:
+            on_page(i, len(todo))
+
+    for row in df.index[incomplete]:
+        fields = known.get(annonce_id(str(df.at[row, url_column])))
+        if not fields:
+            continue
+        for field, column in columns.items():
+            value = df.at[row, column]
+            if field in fields and (value is None or pd.isna(value) or str(value).strip() == ""):
+                df.at[row, column] = fields[field]
+                stats["filled"] += 1
+    return df, stats
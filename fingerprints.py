@@ -0,0 +1,93 @@
+from pathlib import Path
+import sqlite3
+import threading
+import hashlib
+import inspect
+import json
+import zlib
+import time
+
+from scraper import CONTAINER_CLASSES, PLANS, build_record, extract_records, proprietaire_from
+
+# Empreinte du contenu de chaque page de listing : une page identique à celle du
+# dernier passage n'est pas re-parsée, ses annonces sont reprises telles quelles.
+# Fonctionne même sans ETag côté serveur (les vieilles pages changent rarement).
+BASE_DIR = Path(__file__).resolve().parent
+FINGERPRINTS_PATH = BASE_DIR / ".cache" / "fingerprints.sqlite"
+
+
+def extraction_version():
+    # change dès qu'un sélecteur, un champ ou la construction des lignes change : les annonces
+    # gardées pour une page inchangée ne valent que pour l'extraction qui les a produites
+    plans = {type_: [plan.text] + sorted((field, s.tag, s.class_, s.href and s.href.pattern, s.many)
+                                         for selectors in plan.dispatch.values() for field, s in selectors)
+             for type_, plan in PLANS.items()}
+    source = inspect.getsource(build_record) + inspect.getsource(proprietaire_from)
+    spec = json.dumps([plans, CONTAINER_CLASSES, source], sort_keys=True)
+    return hashlib.blake2b(spec.encode("utf-8"), digest_size=8).hexdigest()
+
+EXTRACTION_VERSION = extraction_version()
+
+
+def fingerprint(html, version=None):
+    digest = hashlib.blake2b((version or EXTRACTION_VERSION).encode("utf-8"), digest_size=16)
+    digest.update(html.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class PageFingerprints:
+
+    def __init__(self, path=FINGERPRINTS_PATH):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                digest TEXT,
+                records BLOB,
+                updated_at REAL
+            )""")
+        self._db.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, url, digest):
+        # annonces de la page si son contenu n'a pas changé, sinon None
+        with self._lock:
+            row = self._db.execute("SELECT digest, records FROM pages WHERE url = ?", (url,)).fetchone()
+            if row is None or row[0] != digest:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(zlib.decompress(row[1]))
+
+    def put(self, url, digest, records):
+        blob = zlib.compress(json.dumps(records, default=str).encode("utf-8"))
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?)", (url, digest, blob, time.time()))
+            self._db.commit()
+
+    def lookup(self, url, html):
+        # (empreinte du contenu et de la version d'extraction, annonces déjà extraites ou None)
+        digest = fingerprint(html)
+        return digest, self.get(url, digest)
+
+    def extract(self, url, html, type_):
+        # remplace extract_records : parsing seulement si la page a changé
+        if not html:
+            return []
+        digest, records = self.lookup(url, html)
+        if records is None:
+            records = extract_records(html, type_)
+            self.put(url, digest, records)
+        return records
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM pages")
+            self._db.commit()
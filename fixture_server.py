@@ -0,0 +1,211 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+import argparse
+import hashlib
+import random
+import threading
+import time
+
+from scraper import ANNONCE_RE, CATEGORIES, CONTAINER_CLASSES, category_of
+from archive import HtmlArchive
+
+# Faux dakar-auto.com local pour mesurer le scraper sans réseau :
+#   /senegal/voitures-4?page=N, /senegal/motos-and-scooters-3?page=N, /senegal/location-de-voitures-19?page=N
+#   /senegal/.../annonce-N : page détail de l'annonce
+# Pages enregistrées (archive/) si disponibles, sinon pages synthétiques.
+# Latence, erreurs 5xx et limitation (429) configurables ; erreurs ciblées (page_errors,
+# detail_errors) pour les tests de régression hors ligne (tests/).
+# Usage : python fixture_server.py --port 8000 --latency 0.1 --error-rate 0.02 --rps 20
+
+LAST_PAGES = {"vehicle": 2800, "moto": 60, "location": 10}
+
+MARQUES = [("Toyota", "Corolla"), ("Peugeot", "308"), ("Hyundai", "Tucson"), ("Kia", "Sportage"),
+           ("Mercedes", "C300"), ("Honda", "CRV"), ("Ford", "Explorer"), ("Renault", "Clio")]
+QUARTIERS = ["Grand-Dakar", "Point-E", "Sicap Liberté", "Almadies", "Mermoz", "Ouakam"]
+
+
+# ================= PAGES SYNTHETIQUES =================
+def synthetic_card(type_, annonce, rng):
+    marque, modele = rng.choice(MARQUES)
+    annee = rng.randint(2000, 2024)
+    prix = f"{rng.randint(1, 40) * 500}\u202f000 F CFA" if type_ != "location" else f"{rng.randint(2, 10) * 5}\u202f000 F CFA"
+    km = f"{rng.randint(1, 300)}\u202f000 km"
+    lien = f"https://dakar-auto.com/senegal/{CATEGORIES[type_]}/occasion/{marque.lower()}/{modele.lower()}/annonce-{annonce}"
+    infos = {
+        "vehicle": [f"Année {annee}", km, rng.choice(["Manuelle", "Automatique"]), rng.choice(["Diesel", "Essence"])],
+        "moto": [f"Année {annee}", km],
+        "location": [f"Année {annee}"],
+    }[type_]
+    owner = f'<span class="owner">Parking {rng.choice(QUARTIERS)}</span>' if type_ == "location" else ""
+    content = (
+        f'<div class="{CONTAINER_CLASSES["moto"]}">'
+        f'<a href="{lien}" class="listing-card__header"><h2 class="listing-card__header__title">{marque} {modele} {annee}</h2></a>'
+        f'<div class="listing-card__price"><h3>{prix}</h3></div>'
+        f'<ul class="listing-card__attribute-list">{"".join(f"<li><span>{i}</span></li>" for i in infos)}</ul>'
+        f'<div class="row"><div class="col-12 entry-zone-address">{rng.choice(QUARTIERS)}</div></div>'
+        f'<div class="listing-card__footer"><span>Par {rng.choice(["samuel fall", "awa ndiaye", "kingcars service"])}</span>'
+        f'<a class="btn" href="tel:+221770000000">Appeler</a>{owner}</div>'
+        f'</div>'
+    )
+    if type_ == "vehicle":
+        return f'<div class="{CONTAINER_CLASSES[type_]}"><div class="listing-card">{content}</div></div>'
+    return f'<div class="listing-card">{content}</div>'
+
+def synthetic_page(type_, page, cards=20, seed=0, last_page=None):
+    # structure proche d'une vraie page : beaucoup de balisage hors annonces
+    rng = random.Random(f"{seed}-{type_}-{page}")
+    last_page = last_page or LAST_PAGES[type_]
+    if page > last_page:
+        cards = 0
+    annonce = 140000 - page * cards
+    menu = "".join(f'<li class="nav-item"><a class="nav-link" href="/senegal/cat-{i}">Catégorie {i}</a></li>' for i in range(80))
+    scripts = "".join(f"<script>window.dataLayer=window.dataLayer||[];dataLayer.push({{'e':{i}}});</script>" for i in range(20))
+    pagination = "".join(f'<li class="page-item"><a class="page-link" href="?page={p}">{p}</a></li>'
+                         for p in [*range(max(1, page - 3), min(page + 4, last_page + 1)), last_page])
+    return (
+        f"<!DOCTYPE html><html lang='fr'><head><title>Dakar Auto</title>{scripts}</head><body>"
+        f"<header><nav><ul>{menu}</ul></nav></header><main><div class='listings-cards'>"
+        + "".join(synthetic_card(type_, annonce - i, rng) for i in range(cards))
+        + f"</div><ul class='pagination'>{pagination}</ul></main>"
+        f"<footer><ul>{menu}</ul></footer></body></html>"
+    )
+
+
+def synthetic_detail(annonce, seed=0):
+    # fiche complète : caractéristiques en paires libellé / valeur
+    rng = random.Random(f"{seed}-annonce-{annonce}")
+    marque, modele = rng.choice(MARQUES)
+    specs = [
+        ("Année", str(rng.randint(2000, 2024))),
+        ("Kilométrage", f"{rng.randint(1, 300)}\u202f000 km"),
+        ("Boîte de vitesse", rng.choice(["Manuelle", "Automatique"])),
+        ("Carburant", rng.choice(["Diesel", "Essence", "Hybride"])),
+    ]
+    return (
+        f"<!DOCTYPE html><html lang='fr'><head><title>{marque} {modele}</title></head><body><main>"
+        f"<h1 class='listing-detail__title'>{marque} {modele}</h1>"
+        f"<ul class='listing-detail__specs'>"
+        + "".join(f"<li><span class='label'>{k}</span><span class='value'>{v}</span></li>" for k, v in specs)
+        + f"</ul><p>Annonce n°{annonce}</p></main></body></html>"
+    )
+
+
+# ================= SERVEUR =================
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, comme le vrai site
+
+    def do_GET(self):
+        server = self.server
+        parts = urlsplit(self.path)
+        type_ = category_of(parts.path)
+        detail = ANNONCE_RE.search(parts.path)
+        try:
+            page = int(parse_qs(parts.query).get("page", ["1"])[0])
+        except ValueError:
+            page = 1
+        if type_ is None and detail is None:
+            return self._send(404, b"not found")
+
+        with server.lock:
+            server.requests += 1
+            now = time.monotonic()
+            # limitation : au-delà de rps requêtes sur la dernière seconde -> 429
+            server.recent = [t for t in server.recent if now - t < 1.0]
+            throttled = server.rps and len(server.recent) >= server.rps
+            if not throttled:
+                server.recent.append(now)
+
+        if server.latency:
+            time.sleep(server.latency * server.rng.uniform(0.5, 1.5))
+        if throttled:
+            return self._send(429, b"too many requests", {"Retry-After": "1"})
+        if server.error_rate and server.rng.random() < server.error_rate:
+            return self._send(503, b"service unavailable")
+        status = (server.detail_errors.get(int(detail.group(1))) if detail is not None
+                  else server.page_errors.get((type_, page)))
+        if status:
+            return self._send(status, b"error")
+
+        if detail is not None:
+            body = synthetic_detail(int(detail.group(1)), server.seed).encode("utf-8")
+        else:
+            body = server.page(type_, page).encode("utf-8")
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            return self._send(304, b"", {"ETag": etag})
+        self._send(200, body, {"ETag": etag, "Content-Type": "text/html; charset=utf-8"})
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), latency=0.0, error_rate=0.0, rps=0,
+                 cards=20, last_pages=None, archive=None, seed=0, page_errors=None, detail_errors=None):
+        super().__init__(address, FixtureHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        # statut forcé : {(catégorie, page): 503}, {numéro d'annonce: 404} ; modifiables à chaud
+        self.page_errors = dict(page_errors or {})
+        self.detail_errors = dict(detail_errors or {})
+        self.rps = rps
+        self.cards = cards
+        self.last_pages = {**LAST_PAGES, **(last_pages or {})}
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.recent = []
+        self.requests = 0
+
+        # pages enregistrées : (catégorie, page) -> sha256 dans l'archive
+        self.archive = archive
+        self.recorded = {}
+        if archive is not None:
+            for entry in archive.entries():
+                type_ = category_of(entry["url"])
+                if type_ and entry["status"] == 200 and "page=" in entry["url"]:
+                    self.recorded[(type_, int(entry["url"].rsplit("=", 1)[-1]))] = entry["sha256"]
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/senegal"
+
+    def page(self, type_, page):
+        if (type_, page) in self.recorded:
+            return self.archive.load(self.recorded[(type_, page)])
+        return synthetic_page(type_, page, self.cards, self.seed, self.last_pages[type_])
+
+
+def start_server(**options):
+    # serveur dans un thread, pour les benchmarks / tests ; server.shutdown() pour l'arrêter
+    server = FixtureServer(**options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Faux dakar-auto.com local")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="latence moyenne en secondes")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="proportion de réponses 503")
+    parser.add_argument("--rps", type=int, default=0, help="requêtes/seconde avant 429 (0 = illimité)")
+    parser.add_argument("--cards", type=int, default=20, help="annonces par page synthétique")
+    parser.add_argument("--recorded", action="store_true", help="servir les pages de archive/ quand elles existent")
+    args = parser.parse_args()
+
+    server = FixtureServer((args.host, args.port), args.latency, args.error_rate, args.rps, args.cards,
+                           archive=HtmlArchive() if args.recorded else None)
+    print(f"Serveur de test sur {server.base_url}  (DAKAR_AUTO_BASE_URL={server.base_url})")
+    server.serve_forever()
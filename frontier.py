@@ -0,0 +1,112 @@
+from pathlib import Path
+import sqlite3
+import threading
+import time
+
+# Frontière de crawl persistante : état de chaque page (catégorie, numéro) d'un crawl,
+# pour reprendre un crawl interrompu là où il s'est arrêté.
+#   pending   -> à télécharger
+#   in_flight -> en cours (redevient pending à la reprise)
+#   done      -> traitée, avec son nombre d'annonces
+#   failed    -> échec de téléchargement (re-tentée à la reprise)
+#   end       -> page téléchargée sans aucune annonce : fin de la catégorie
+#   skipped   -> au-delà de la dernière page / de l'arrêt incrémental
+BASE_DIR = Path(__file__).resolve().parent
+FRONTIER_PATH = BASE_DIR / ".cache" / "frontier.sqlite"
+
+
+class Frontier:
+
+    def __init__(self, path=FRONTIER_PATH):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS frontier (
+                crawl TEXT,
+                category TEXT,
+                page INTEGER,
+                url TEXT,
+                state TEXT,
+                records INTEGER DEFAULT 0,
+                attempts INTEGER DEFAULT 0,
+                error TEXT,
+                updated_at REAL,
+                PRIMARY KEY (crawl, category, page)
+            )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_frontier_state ON frontier(crawl, category, state, page)")
+        self._db.commit()
+
+    def _execute(self, sql, params=(), many=False):
+        with self._lock:
+            cursor = self._db.executemany(sql, params) if many else self._db.execute(sql, params)
+            self._db.commit()
+            return cursor
+
+    def add(self, crawl, category, pages, url_for):
+        # idempotent : les pages déjà connues gardent leur état
+        now = time.time()
+        self._execute(
+            "INSERT OR IGNORE INTO frontier (crawl, category, page, url, state, updated_at) VALUES (?, ?, ?, ?, 'pending', ?)",
+            [(crawl, category, p, url_for(category, p), now) for p in pages], many=True)
+
+    def resume(self, crawl, category):
+        # après un arrêt brutal : pages en cours et échecs repartent en attente
+        self._execute(
+            "UPDATE frontier SET state = 'pending', updated_at = ? "
+            "WHERE crawl = ? AND category = ? AND state IN ('in_flight', 'failed')",
+            (time.time(), crawl, category))
+
+    def pending(self, crawl, category):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT page FROM frontier WHERE crawl = ? AND category = ? AND state = 'pending' ORDER BY page",
+                (crawl, category)).fetchall()
+        return [page for (page,) in rows]
+
+    def mark(self, crawl, category, page, state, records=0, error=None):
+        self._execute(
+            "UPDATE frontier SET state = ?, records = ?, error = ?, attempts = attempts + (? = 'in_flight'), "
+            "updated_at = ? WHERE crawl = ? AND category = ? AND page = ?",
+            (state, records, error, state, time.time(), crawl, category, page))
+
+    def skip_after(self, crawl, category, page):
+        # fin de catégorie atteinte : les pages suivantes ne seront jamais traitées
+        self._execute(
+            "UPDATE frontier SET state = 'skipped', updated_at = ? "
+            "WHERE crawl = ? AND category = ? AND page > ? AND state IN ('pending', 'in_flight')",
+            (time.time(), crawl, category, page))
+
+    def reset(self, crawl, category=None):
+        if category is None:
+            self._execute("DELETE FROM frontier WHERE crawl = ?", (crawl,))
+        else:
+            self._execute("DELETE FROM frontier WHERE crawl = ? AND category = ?", (crawl, category))
+
+    def crawls(self, prefix):
+        # crawls dont l'identifiant commence par prefix (shards d'un catalogue)
+        with self._lock:
+            rows = self._db.execute("SELECT DISTINCT crawl FROM frontier WHERE substr(crawl, 1, ?) = ? ORDER BY crawl",
+                                    (len(prefix), prefix)).fetchall()
+        return [crawl for (crawl,) in rows]
+
+    def status(self, crawl, category=None):
+        # {état: (pages, annonces)}
+        sql = "SELECT state, COUNT(*), COALESCE(SUM(records), 0) FROM frontier WHERE crawl = ?"
+        params = [crawl]
+        if category is not None:
+            sql += " AND category = ?"
+            params.append(category)
+        with self._lock:
+            rows = self._db.execute(sql + " GROUP BY state", params).fetchall()
+        return {state: (pages, records) for state, pages, records in rows}
+
+    def complete(self, crawl, category):
+        # fin de catégorie atteinte (vraie page vide) sans page en attente ni en échec
+        status = self.status(crawl, category)
+        return "end" in status and not any(s in status for s in ("pending", "in_flight", "failed"))
+
+    def unfinished(self, crawl):
+        status = self.status(crawl)
+        return bool(status) and any(status.get(s, (0, 0))[0] for s in ("pending", "in_flight", "failed"))
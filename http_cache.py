@@ -0,0 +1,136 @@
+from pathlib import Path
+import sqlite3
+import threading
+import time
+import zlib
+
+# Cache disque des pages d'annonces (SQLite), clé = URL
+BASE_DIR = Path(__file__).resolve().parent
+CACHE_DIR = BASE_DIR / ".cache"
+
+DEFAULT_TTL = 15 * 60               # secondes avant revalidation
+DEFAULT_MAX_BYTES = 200 * 1024**2   # taille max (corps compressés)
+
+
+class HttpCache:
+
+    def __init__(self, path=CACHE_DIR / "http_cache.sqlite", ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0          # servies depuis le disque sans réseau
+        self.revalidated = 0   # 304 Not Modified
+        self.misses = 0        # téléchargement complet
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL,
+                last_access REAL,
+                size INTEGER,
+                body BLOB
+            )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON responses(last_access)")
+        self._db.commit()
+
+    # ---- lecture / écriture ----
+    def lookup(self, url):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag, last_modified, fetched_at, body FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, fetched_at, body = row
+        return {"etag": etag, "last_modified": last_modified, "fetched_at": fetched_at,
+                "text": zlib.decompress(body).decode("utf-8")}
+
+    def store(self, url, text, etag=None, last_modified=None):
+        body = zlib.compress(text.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, now, now, len(body), body),
+            )
+            self._evict()
+            self._db.commit()
+
+    def _touch(self, url, counter, saved, revalidated=False):
+        now = time.time()
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+            self.bytes_saved += saved
+            if revalidated:
+                self._db.execute("UPDATE responses SET fetched_at = ?, last_access = ? WHERE url = ?", (now, now, url))
+            else:
+                self._db.execute("UPDATE responses SET last_access = ? WHERE url = ?", (now, url))
+            self._db.commit()
+
+    def _evict(self):
+        # LRU : on supprime les entrées les moins récemment lues jusqu'à repasser sous la limite
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for url, size in self._db.execute("SELECT url, size FROM responses ORDER BY last_access").fetchall():
+            self._db.execute("DELETE FROM responses WHERE url = ?", (url,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    # ---- GET avec cache ----
+    def fetch(self, url, get):
+        # get(url, headers=...) -> réponse requests
+        entry = self.lookup(url)
+
+        if entry and time.time() - entry["fetched_at"] < self.ttl:
+            self._touch(url, "hits", len(entry["text"]))
+            return entry["text"]
+
+        headers = {}
+        if entry:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = get(url, headers=headers)
+
+        if response.status_code == 304 and entry:
+            self._touch(url, "revalidated", len(entry["text"]), revalidated=True)
+            return entry["text"]
+
+        # une page d'erreur n'est jamais rendue comme contenu
+        response.raise_for_status()
+        with self._lock:
+            self.misses += 1
+        if response.status_code == 200:
+            self.store(url, response.text,
+                       response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        return response.text
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "bytes_saved": self.bytes_saved,
+            "entries": entries,
+            "size": size,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,110 @@
+from collections import OrderedDict
+import threading
+import traceback
+import logging
+import uuid
+import time
+
+# Tâches de scraping en arrière-plan : elles survivent aux reruns Streamlit,
+# l'interface ne fait que consulter leur état.
+
+MAX_JOBS = 20   # historique conservé (les plus anciennes tâches terminées sont oubliées)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+
+    def __init__(self, label, params=None):
+        self.id = uuid.uuid4().hex[:8]
+        self.label = label
+        self.params = params or {}
+        self.status = "pending"      # pending, running, done, cancelled, failed
+        self.progress = 0.0
+        self.messages = []
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self._cancel = threading.Event()
+        self.thread = None
+
+    @property
+    def active(self):
+        return self.status in ("pending", "running")
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def check(self):
+        # à appeler régulièrement dans la tâche
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def on_progress(self, done, total):
+        # callback on_page des fonctions de scraping
+        self.progress = done / total if total else 1.0
+        self.check()
+
+    def log(self, message):
+        self.messages.append(message)
+
+
+class JobManager:
+
+    def __init__(self, max_jobs=MAX_JOBS):
+        self.max_jobs = max_jobs
+        self.jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, label, fn, exclusive=False, **params):
+        # fn(job, **params) -> résultat conservé dans job.result
+        # exclusive : refusée (None) tant qu'une autre tâche est en cours (mêmes fichiers de sortie)
+        job = Job(label, params)
+        job.thread = threading.Thread(target=self._run, args=(job, fn), name=f"job-{job.id}", daemon=True)
+        with self._lock:
+            if exclusive and any(j.active for j in self.jobs.values()):
+                return None
+            self.jobs[job.id] = job
+            self._trim()
+        job.thread.start()
+        return job
+
+    def _run(self, job, fn):
+        job.status = "running"
+        try:
+            job.result = fn(job, **job.params)
+            job.progress = 1.0
+            job.status = "done"
+        except JobCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            job.error = f"{e}"
+            job.status = "failed"
+            logging.warning(f"Tâche {job.id} en erreur : {traceback.format_exc()}")
+        finally:
+            job.finished = time.time()
+
+    def _trim(self):
+        finished = [j for j in self.jobs.values() if not j.active]
+        while len(self.jobs) > self.max_jobs and finished:
+            del self.jobs[finished.pop(0).id]
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job:
+            job.cancel()
+
+    def list(self, status=None):
+        with self._lock:
+            jobs = list(self.jobs.values())
+        return [j for j in reversed(jobs) if status is None or j.status == status]
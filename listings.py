@@ -0,0 +1,199 @@
+from pathlib import Path
+import threading
+import sqlite3
+import time
+import re
+
+import pandas as pd
+
+from scraper import annonce_id
+from dedup import URL_COLUMNS
+
+# Base des annonces : une table pour les trois catégories, une ligne par annonce
+# (upsert sur l'identifiant), index sur les colonnes filtrées par les dashboards.
+# Alimentée par les scrapings (runner.py) et par les jeux nettoyés de Data/ (datasets.py).
+BASE_DIR = Path(__file__).resolve().parent
+LISTINGS_PATH = BASE_DIR / "Data" / "listings.sqlite"
+
+COLUMNS = ["category", "marque", "modele", "annee", "prix", "kilometrage", "boite", "carburant",
+           "adresse", "proprietaire", "url", "source"]
+INDEXED = ["marque", "modele", "annee", "prix", "adresse"]
+
+# colonnes des jeux nettoyés (datasets.py) -> colonnes de la base
+DATASET_COLUMNS = {"Marque1": "marque", "Modele": "modele", "ANNEE1": "annee", "PRIX1": "prix",
+                   "KILOMETRAGE": "kilometrage", "BOITE": "boite", "CARBURANT": "carburant",
+                   "ADRESSE": "adresse", "PROPRIETAIRE": "proprietaire"}
+
+MODELE_RE = re.compile(r"/([^/]+)/annonce-\d+")
+
+
+def clean_text(value):
+    if value is None or value != value:
+        return None
+    value = " ".join(str(value).split())
+    return value or None
+
+def clean_int(value):
+    if value is None or value is pd.NA:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):   # NaN compris
+        return None
+
+def modele_from(url):
+    # les cartes n'ont pas le modèle à part : il est dans l'URL (.../toyota/corolla/annonce-N)
+    match = MODELE_RE.search(url or "")
+    return match.group(1).replace("-", " ").title() if match else None
+
+
+class ListingsDB:
+
+    def __init__(self, path=LISTINGS_PATH):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+        # WAL : les lectures des dashboards ne bloquent pas l'écriture d'un scraping
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS listings (
+                annonce INTEGER PRIMARY KEY,
+                category TEXT NOT NULL,
+                marque TEXT,
+                modele TEXT,
+                annee INTEGER,
+                prix INTEGER,
+                kilometrage INTEGER,
+                boite TEXT,
+                carburant TEXT,
+                adresse TEXT,
+                proprietaire TEXT,
+                url TEXT,
+                source TEXT,
+                first_seen REAL,
+                updated_at REAL
+            )""")
+        for column in INDEXED:
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS idx_listings_{column} ON listings(category, {column})")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_listings_updated ON listings(updated_at)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS sources (name TEXT PRIMARY KEY, version INTEGER)")
+        self._db.commit()
+
+    # ================= ECRITURE =================
+    def upsert(self, type_, records, source="scrape"):
+        # une ligne par annonce ; une valeur absente n'écrase pas une valeur connue
+        rows = []
+        for record in records:
+            url = record.get("url")
+            id_ = annonce_id(url) if isinstance(url, str) else None
+            if id_ is None:
+                continue
+            rows.append((
+                id_, type_, clean_text(record.get("marque")), clean_text(record.get("modele")) or modele_from(url),
+                clean_int(record.get("annee")), clean_int(record.get("prix")), clean_int(record.get("kilometrage")),
+                clean_text(record.get("boite")), clean_text(record.get("carburant")),
+                clean_text(record.get("adresse")), clean_text(record.get("proprietaire")), url, source,
+            ))
+        updates = ", ".join(f"{c} = COALESCE(excluded.{c}, listings.{c})" for c in COLUMNS)
+        with self._lock:
+            # horodatage pris sous le verrou : updated_at croît dans l'ordre des écritures
+            # (synchronisation incrémentale, analytics.Analytics)
+            now = time.time()
+            rows = [row + (now, now) for row in rows]
+            self._db.executemany(
+                f"INSERT INTO listings (annonce, {', '.join(COLUMNS)}, first_seen, updated_at) "
+                f"VALUES ({', '.join('?' * (len(COLUMNS) + 3))}) "
+                f"ON CONFLICT (annonce) DO UPDATE SET {updates}, updated_at = excluded.updated_at",
+                rows)
+            self._db.commit()
+        return len(rows)
+
+    def import_dataset(self, type_, df):
+        # jeu nettoyé de Data/ (datasets.load)
+        url_column = next((c for c in URL_COLUMNS if c in df.columns), None)
+        if url_column is None:
+            return 0
+        columns = {c: name for c, name in DATASET_COLUMNS.items() if c in df.columns}
+        frame = df[[url_column, *columns]].rename(columns={url_column: "url", **columns})
+        frame = frame.astype(object).where(frame.notna(), None)
+        return self.upsert(type_, frame.to_dict("records"), source="data")
+
+    def sync(self, name, version, load):
+        # (ré)import d'une source seulement si elle a changé depuis le dernier import
+        with self._lock:
+            row = self._db.execute("SELECT version FROM sources WHERE name = ?", (name,)).fetchone()
+        if row is not None and row[0] == version:
+            return 0
+        count = load()
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO sources VALUES (?, ?)", (name, version))
+            self._db.commit()
+        return count
+
+    # ================= REQUETES =================
+    def _read(self, sql, params=()):
+        with self._lock:
+            return pd.read_sql_query(sql, self._db, params=params)
+
+    def where(self, type_, marque=None, modele=None, annee=None, prix=None, adresse=None):
+        clauses, params = ["category = ?"], [type_]
+        for column, value in (("marque", marque), ("modele", modele), ("adresse", adresse)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        for column, bounds in (("annee", annee), ("prix", prix)):
+            if bounds:
+                low, high = bounds
+                if low is not None:
+                    clauses.append(f"{column} >= ?")
+                    params.append(low)
+                if high is not None:
+                    clauses.append(f"{column} <= ?")
+                    params.append(high)
+        return " AND ".join(clauses), params
+
+    def version(self):
+        # change à chaque insertion / mise à jour (index sur updated_at)
+        with self._lock:
+            return self._db.execute("SELECT MAX(updated_at) FROM listings").fetchone()[0]
+
+    def changes(self, since=None):
+        # annonces insérées / modifiées après `since` (index sur updated_at), toutes sinon
+        if since is None:
+            return self._read("SELECT * FROM listings")
+        return self._read("SELECT * FROM listings WHERE updated_at > ?", (since,))
+
+    def count(self, type_):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM listings WHERE category = ?", (type_,)).fetchone()[0]
+
+    def query(self, type_, limit=None, **filters):
+        where, params = self.where(type_, **filters)
+        sql = f"SELECT annonce, {', '.join(COLUMNS)} FROM listings WHERE {where} ORDER BY annonce DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return self._read(sql, params)
+
+    def price_stats(self, type_, **filters):
+        where, params = self.where(type_, **filters)
+        row = self._read(f"SELECT COUNT(*) AS total, MIN(prix) AS prix_min, AVG(prix) AS prix_moyen, "
+                         f"MAX(prix) AS prix_max FROM listings WHERE {where}", params)
+        return row.iloc[0].to_dict()
+
+    def top(self, type_, column, n=5, **filters):
+        # colonne indexée : GROUP BY parcourt l'index (category, colonne)
+        if column not in INDEXED:
+            raise ValueError(f"colonne non indexée : {column}")
+        where, params = self.where(type_, **filters)
+        return self._read(f"SELECT {column}, COUNT(*) AS annonces FROM listings "
+                          f"WHERE {where} AND {column} IS NOT NULL GROUP BY {column} "
+                          f"ORDER BY annonces DESC, {column} LIMIT ?", [*params, n])
+
+    def values(self, type_, column):
+        if column not in INDEXED:
+            raise ValueError(f"colonne non indexée : {column}")
+        with self._lock:
+            rows = self._db.execute(f"SELECT DISTINCT {column} FROM listings WHERE category = ? "
+                                    f"AND {column} IS NOT NULL ORDER BY {column}", (type_,)).fetchall()
+        return [value for (value,) in rows]
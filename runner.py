@@ -0,0 +1,199 @@
+from pathlib import Path
+import time
+
+import pandas as pd
+
+from scraper import CATEGORIES, scrape_pipeline, crawl_categories, known_annonce_ids
+from storage import RecordSink
+from archive import HtmlArchive, replay
+from catalog import crawl_catalog, catalog_complete
+from dedup import AnnonceIndex
+from delta import DeltaSink
+from enrich import DetailStore, enrich
+import datasets
+
+# Orchestration d'un scraping, commune à l'application Streamlit (FDTD111.py) et à la
+# ligne de commande (scrape_cli.py). `job` fournit log(message) et on_progress(done, total)
+# (jobs.Job) : aucune dépendance à l'interface ici.
+
+BASE_DIR = Path(__file__).resolve().parent
+DATA_DIR = BASE_DIR / "Data"
+
+OUTPUTS = {"vehicle": "Vehicles_data.csv", "moto": "Motocycles_data.csv", "location": "Locations_data.csv"}
+MODES = ["full", "incremental", "resume", "catalog", "offline", "enrich"]
+
+
+def crawl_id(selected, pages, first_page=1):
+    # identifiant du crawl dans la frontière
+    if first_page > 1:
+        return f"{'+'.join(selected)}/{first_page}-{pages}"
+    return f"{'+'.join(selected)}/{pages}"
+
+def read_output(path):
+    path = Path(path)
+    if not path.exists():
+        return pd.DataFrame()
+    return pd.read_parquet(path) if path.suffix == ".parquet" else pd.read_csv(path)
+
+def write_output(df, path):
+    path = Path(path)
+    if path.suffix == ".parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+def track(deltas, sinks, started):
+    # les annonces écrites passent aussi dans l'historique des prix
+    if deltas is None:
+        return sinks
+    return {type_: DeltaSink(deltas, type_, sink, started) for type_, sink in sinks.items()}
+
+def log_enrich(job, label, stats):
+    job.log(f"{label} : {stats['incomplete']} annonces incomplètes, "
+            f"{stats['fetched']} pages détail téléchargées, {stats['filled']} champs complétés")
+
+def log_deltas(job, sinks):
+    for type_, sink in sinks.items():
+        if isinstance(sink, DeltaSink):
+            counts = sink.counts
+            job.log(f"Historique {CATEGORIES[type_]} : {counts['insert']} nouvelles, "
+                    f"{counts['update']} modifiées, {counts['unchanged']} inchangées")
+
+def run_scrape(job, selected, pages, mode, workers, cache, throttle, archive, multiprocess, frontier=None, seen=None,
+               deltas=None, known=None, first_page=1, outputs=None, catalog_dir=None, fingerprints=None,
+               details=None, listings=None):
+    # seen : index des annonces déjà ingérées (dedup.AnnonceIndex) ; elles sont rejetées avant
+    # d'être écrites et les exports sont alors complétés au lieu d'être remplacés. Les nouvelles
+    # annonces n'entrent dans l'index qu'une fois écrites dans l'export.
+    # deltas : historique des prix (insertions, modifications, disparitions)
+    # known : annonces connues pour le mode incrémental (par défaut : Data/ et les exports) ; si
+    # c'est l'index, les annonces écrites dans les exports y entrent, dédoublonnage actif ou non
+    # fingerprints : empreintes des pages, les pages inchangées ne sont pas re-parsées
+    # details : pages détail déjà téléchargées (mode "enrich")
+    # listings : base des annonces (listings.ListingsDB), mise à jour avec les résultats
+    outputs = outputs or OUTPUTS
+    append = seen is not None
+    index = seen if seen is not None else known if isinstance(known, AnnonceIndex) else None
+    if seen is not None:
+        seen = seen.reserve()
+    # sans cela, une passe incrémentale après un scraping complet re-scraperait tout l'export
+    on_flush = index.commit if index is not None else None
+    started = time.time()
+    if mode == "offline":
+        # extraction refaite sur les pages archivées, sans aucune requête
+        sinks = {type_: RecordSink(outputs[type_], on_flush=on_flush) for type_ in selected}
+        results = replay(HtmlArchive(), selected, sinks=sinks, on_page=job.on_progress)
+        results = {type_: results.get(type_, pd.DataFrame()) for type_ in selected}
+    elif mode == "enrich":
+        # champs manquants complétés par les pages détail des annonces : exports du scraping
+        # puis jeux de Data/ (dashboards), dont les champs complétés passent dans la base
+        details = details if details is not None else DetailStore()
+        steps = 2 * len(selected)
+
+        def fill(type_, step):
+            return lambda df: enrich(df, type_, details, workers, cache=cache, throttle=throttle,
+                                     on_page=lambda done, total: job.on_progress(step + done / total, steps))
+
+        results = {}
+        for i, type_ in enumerate(selected):
+            df, stats = fill(type_, 2 * i)(read_output(outputs[type_]))
+            log_enrich(job, CATEGORIES[type_], stats)
+            if stats["filled"]:
+                write_output(df, outputs[type_])
+            results[type_] = df
+            if not datasets.exists(type_):
+                continue
+            _, stats = datasets.enrich_source(type_, fill(type_, 2 * i + 1))
+            log_enrich(job, f"Data/{datasets.SOURCES[type_]}", stats)
+            if stats["filled"] and listings is not None:
+                version = datasets.version(type_)
+                listings.sync(f"data:{type_}", version, lambda: listings.import_dataset(type_, datasets.load(type_)))
+    elif mode == "catalog":
+        # toutes les pages : dernière page découverte automatiquement, crawl par shards en parallèle ;
+        # un catalogue interrompu (annulation, pages en échec) est repris au lancement suivant
+        results = {}
+        for i, type_ in enumerate(selected):
+            path, rows = crawl_catalog(type_, catalog_dir or DATA_DIR / "catalog", workers=workers,
+                                       throttle=throttle, frontier=frontier,
+                                       cache_path=cache.path if cache is not None else None,
+                                       archive_root=archive.root if archive is not None else None,
+                                       on_page=lambda done, total: job.on_progress(i + done / total, len(selected)))
+            job.log(f"{CATEGORIES[type_]} : {rows} annonces ({path.name})")
+            results[type_] = pd.read_csv(path) if rows else pd.DataFrame()
+            write_output(results[type_], outputs[type_])
+            if index is not None and rows:
+                index.commit(results[type_].to_dict("records"))
+            if deltas is not None and rows:
+                counts = deltas.observe(type_, results[type_].to_dict("records"), started)
+                if catalog_complete(frontier, type_):
+                    # catalogue complet : les annonces absentes ont disparu du site
+                    counts["delete"] = deltas.sweep(type_, started)
+                else:
+                    job.log(f"Historique {CATEGORIES[type_]} : catalogue incomplet, disparitions non calculées")
+                job.log(f"Historique {CATEGORIES[type_]} : {counts}")
+    elif mode == "incremental":
+        if known is None:
+            known = seen if seen is not None else known_annonce_ids(
+                list(DATA_DIR.glob("*.csv")) + [Path(f) for f in outputs.values()])
+        new = crawl_categories({type_: pages for type_ in selected}, workers, known, cache=cache,
+                               throttle=throttle, archive=archive, on_page=job.on_progress, seen=seen,
+                               first_page=first_page, fingerprints=fingerprints)
+        results = {}
+        for type_, new_df in new.items():
+            job.log(f"{CATEGORIES[type_]} : {len(new_df)} nouvelles annonces")
+            if deltas is not None and len(new_df):
+                deltas.observe(type_, new_df.to_dict("records"), started)
+            # on complète l'export précédent avec les nouvelles annonces
+            results[type_] = pd.concat([new_df, read_output(outputs[type_])], ignore_index=True)
+            write_output(results[type_], outputs[type_])
+            if index is not None:
+                # annonces désormais dans l'export : la prochaine passe incrémentale s'arrête à elles
+                index.commit(new_df.to_dict("records"))
+    else:
+        # L'état de chaque page est noté dans la frontière : un crawl interrompu reprend
+        # là où il s'est arrêté (mode "resume") en complétant les CSV existants.
+        crawl = crawl_id(selected, pages, first_page)
+        if mode != "resume":
+            frontier.reset(crawl)
+        sinks = track(deltas, {type_: RecordSink(outputs[type_], append=append or mode == "resume", on_flush=on_flush)
+                               for type_ in selected}, started)
+        if multiprocess and mode == "full":
+            # téléchargement et parsing sur plusieurs processus ; pages dans l'ordre page par
+            # page puis catégorie (chacune arrêtée à sa dernière page), annonces écrites au fil de
+            # l'eau dans les CSV de sortie
+            jobs = [(type_, p) for p in range(first_page, pages + 1) for type_ in selected]
+            results = scrape_pipeline(jobs, workers, cache=cache, throttle=throttle, archive=archive, sinks=sinks,
+                                      on_page=job.on_progress, seen=seen, fingerprints=fingerprints,
+                                      frontier=frontier, crawl=crawl)
+        else:
+            # une file par catégorie, en parallèle ; arrêt à la dernière page de chacune
+            results = crawl_categories({type_: pages for type_ in selected}, workers, cache=cache,
+                                       throttle=throttle, archive=archive, sinks=sinks, on_page=job.on_progress,
+                                       frontier=frontier, crawl=crawl, seen=seen, first_page=first_page,
+                                       fingerprints=fingerprints)
+        for state, (count, rows) in sorted(frontier.status(crawl).items()):
+            job.log(f"Frontière : {count} pages {state}, {rows} annonces")
+        log_deltas(job, sinks)
+        if deltas is not None and mode == "full" and first_page == 1:
+            # disparitions seulement si la catégorie a été crawlée jusqu'à sa vraie dernière page, sans échec
+            for type_ in selected:
+                if frontier.complete(crawl, type_):
+                    job.log(f"Historique {CATEGORIES[type_]} : {deltas.sweep(type_, started)} annonces disparues")
+                else:
+                    job.log(f"Historique {CATEGORIES[type_]} : crawl incomplet, disparitions non calculées")
+
+    if listings is not None:
+        for type_, df in results.items():
+            job.log(f"Base des annonces {CATEGORIES[type_]} : {listings.upsert(type_, df.to_dict('records'))} "
+                    f"annonces enregistrées, {listings.count(type_)} au total")
+    if cache is not None:
+        stats = cache.stats()
+        job.log(f"Cache HTTP : {stats['hits']} hits, {stats['revalidated']} revalidées (304), "
+                f"{stats['misses']} téléchargées, {stats['bytes_saved'] / 1024:.0f} Ko économisés")
+    if fingerprints is not None:
+        stats = fingerprints.stats()
+        job.log(f"Pages inchangées (non re-parsées) : {stats['hits']}, pages parsées : {stats['misses']}")
+    for host, stats in throttle.stats().items():
+        job.log(f"{host} : {stats['requests']} requêtes, {stats['failures']} échecs/reprises, "
+                f"parallélisme {stats['concurrency']}, circuit {stats['circuit']}")
+    return results
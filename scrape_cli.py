@@ -0,0 +1,160 @@
+from pathlib import Path
+import argparse
+import logging
+import json
+import sys
+import time
+
+from scraper import CATEGORIES, DEFAULT_WORKERS
+from http_cache import HttpCache
+from throttle import Throttle, DEFAULT_RATE
+from archive import HtmlArchive
+from jobs import Job
+from frontier import Frontier, FRONTIER_PATH
+from dedup import AnnonceIndex
+from delta import DeltaStore
+from fingerprints import PageFingerprints
+from enrich import DetailStore
+from listings import ListingsDB, LISTINGS_PATH
+from runner import OUTPUTS, MODES, DATA_DIR, crawl_id, run_scrape
+
+# Scraping sans interface (cron, serveur sans écran), même orchestration que l'application.
+# Usage : python scrape_cli.py --categories vehicle moto --pages 1-50 --workers 16 --format parquet
+# Code de sortie : 0 succès, 1 pages en échec ou aucune annonce, 2 erreur, 130 interrompu.
+
+EXIT_OK, EXIT_PARTIAL, EXIT_ERROR, EXIT_INTERRUPTED = 0, 1, 2, 130
+
+
+class ConsoleJob(Job):
+    # messages et progression (tous les 10 %) sur stderr, le résumé reste seul sur stdout
+
+    def __init__(self, label, params=None, quiet=False):
+        super().__init__(label, params)
+        self.quiet = quiet
+        self._step = -1
+
+    def log(self, message):
+        super().log(message)
+        if not self.quiet:
+            print(message, file=sys.stderr, flush=True)
+
+    def on_progress(self, done, total):
+        super().on_progress(done, total)
+        step = int(self.progress * 10)
+        if step > self._step and not self.quiet:
+            self._step = step
+            print(f"[{self.label}] {self.progress:.0%}", file=sys.stderr, flush=True)
+
+
+def page_range(value):
+    # "50" -> pages 1 à 50, "20-50" -> pages 20 à 50
+    first, _, last = value.partition("-")
+    try:
+        first, last = (int(first), int(last)) if last else (1, int(first))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"plage de pages invalide : {value}")
+    if not 1 <= first <= last:
+        raise argparse.ArgumentTypeError(f"plage de pages invalide : {value}")
+    return first, last
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scraping dakar-auto.com en ligne de commande")
+    parser.add_argument("--categories", nargs="+", choices=list(CATEGORIES), default=list(CATEGORIES))
+    parser.add_argument("--pages", type=page_range, default=(1, 10), help="N ou DEBUT-FIN (défaut : 1-10)")
+    parser.add_argument("--mode", choices=MODES, default="full")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="téléchargements en parallèle")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="requêtes/seconde max par hôte")
+    parser.add_argument("--multiprocess", action="store_true", help="parsing sur plusieurs processus (mode full)")
+    # par défaut les mêmes fichiers que l'application (indépendamment du répertoire courant, pour cron) :
+    # frontière, index, historique des prix et empreintes partagés
+    parser.add_argument("--cache-dir", type=Path, default=FRONTIER_PATH.parent,
+                        help="cache HTTP, frontière, index et historique (défaut : ceux de l'application)")
+    parser.add_argument("--no-cache", action="store_true", help="ne pas utiliser le cache HTTP")
+    parser.add_argument("--reparse", action="store_true", help="re-parser aussi les pages inchangées")
+    parser.add_argument("--archive", action="store_true", help="archiver le HTML brut (archive/)")
+    parser.add_argument("--dedup", action="store_true",
+                        help="ignorer les annonces déjà ingérées (exports complétés) ; sans effet avec --history")
+    parser.add_argument("--history", action="store_true", help="enregistrer l'historique des prix")
+    parser.add_argument("--output-dir", type=Path, default=Path("."))
+    parser.add_argument("--db", type=Path, default=LISTINGS_PATH, help="base SQLite des annonces (upsert)")
+    parser.add_argument("--no-db", action="store_true", help="ne pas mettre à jour la base des annonces")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--json", action="store_true", help="résumé final en JSON sur stdout")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args(argv)
+    if args.format == "parquet" and (args.dedup or args.mode in ("resume", "incremental")):
+        parser.error("les exports ne peuvent être complétés qu'en CSV (--dedup, --mode resume/incremental)")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    first_page, pages = args.pages
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    outputs = {type_: args.output_dir / Path(OUTPUTS[type_]).with_suffix(f".{args.format}").name
+               for type_ in args.categories}
+    cache_dir = args.cache_dir
+    frontier = Frontier(cache_dir / "frontier.sqlite")
+    index = AnnonceIndex(cache_dir / "annonce_ids.bin")
+    if not len(index):
+        index.bootstrap(list(DATA_DIR.glob("*.csv")) + [p for p in outputs.values() if p.suffix == ".csv"])
+
+    job = ConsoleJob(f"{'+'.join(args.categories)} / pages {first_page}-{pages} / {args.mode}", quiet=args.quiet)
+    started = time.time()
+    status, error, results = EXIT_OK, None, {}
+    try:
+        results = run_scrape(
+            job, args.categories, pages, args.mode, args.workers,
+            cache=None if args.no_cache else HttpCache(cache_dir / "http_cache.sqlite"),
+            throttle=Throttle(rate=args.rate),
+            archive=HtmlArchive() if args.archive else None,
+            multiprocess=args.multiprocess,
+            frontier=frontier,
+            seen=index if args.dedup and not args.history else None,
+            deltas=DeltaStore(cache_dir / "deltas.sqlite") if args.history else None,
+            known=index,
+            first_page=first_page,
+            outputs=outputs,
+            catalog_dir=args.output_dir / "catalog",
+            fingerprints=None if args.reparse else PageFingerprints(cache_dir / "fingerprints.sqlite"),
+            details=DetailStore(cache_dir / "details.sqlite"),
+            listings=None if args.no_db else ListingsDB(args.db),
+        )
+    except KeyboardInterrupt:
+        status, error = EXIT_INTERRUPTED, "interrompu"
+    except Exception as e:
+        logging.exception("Scraping en erreur")
+        status, error = EXIT_ERROR, f"{e}"
+
+    failed = frontier.status(crawl_id(args.categories, pages, first_page)).get("failed", (0, 0))[0] \
+        if args.mode in ("full", "resume") else 0
+    records = {type_: len(df) for type_, df in results.items()}
+    if status == EXIT_OK and (failed or not sum(records.values())):
+        status = EXIT_PARTIAL
+
+    summary = {
+        "status": status,
+        "mode": args.mode,
+        "categories": args.categories,
+        "pages": [first_page, pages],
+        "records": records,
+        "failed_pages": failed,
+        "outputs": {type_: str(path) for type_, path in outputs.items()},
+        "duration": round(time.time() - started, 1),
+        "error": error,
+        "messages": job.messages,
+    }
+    if args.json:
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+    elif not args.quiet:
+        for type_, count in records.items():
+            print(f"{CATEGORIES[type_]} : {count} annonces -> {outputs[type_]}")
+        print(f"Terminé en {summary['duration']} s, {failed} pages en échec"
+              + (f", erreur : {error}" if error else ""))
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
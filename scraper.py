@@ -0,0 +1,632 @@
+from bs4 import BeautifulSoup as bs, SoupStrainer, NavigableString, CData
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+from storage import MemorySink
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import closing
+from collections import deque
+from itertools import islice
+import pandas as pd
+import requests
+import threading
+import logging
+import queue
+import os
+import re
+
+# ================= CATEGORIES =================
+# DAKAR_AUTO_BASE_URL permet de viser le serveur local de test (fixture_server.py)
+BASE_URL = os.environ.get("DAKAR_AUTO_BASE_URL", "https://dakar-auto.com/senegal")
+
+CATEGORIES = {
+    "vehicle": "voitures-4",
+    "moto": "motos-and-scooters-3",
+    "location": "location-de-voitures-19",
+}
+
+DEFAULT_WORKERS = 8
+
+ANNONCE_RE = re.compile(r"annonce-(\d+)")
+
+
+def page_url(type_, page):
+    return f"{BASE_URL}/{CATEGORIES[type_]}?page={page}"
+
+def detail_url(url):
+    # les liens d'annonce pointent vers le vrai site : même hôte que BASE_URL (serveur de test)
+    return re.sub(r"^https?://[^/]+/senegal", BASE_URL, url)
+
+def category_of(url):
+    for type_, slug in CATEGORIES.items():
+        if f"/{slug}?" in url or url.endswith(f"/{slug}"):
+            return type_
+
+
+# ================= SESSION HTTP =================
+DEFAULT_POOL_SIZE = 32
+DEFAULT_TIMEOUT = (5, 30)  # (connexion, lecture) en secondes
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (compatible; DakarAutoScraper/1.0)",
+    "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "fr-FR,fr;q=0.9,en;q=0.5",
+    "Connection": "keep-alive",
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+def make_session(pool_size=DEFAULT_POOL_SIZE, headers=None):
+    session = requests.Session()
+    # gzip/deflate toujours, br seulement si brotli est installé
+    session.headers.update(make_headers(accept_encoding=True))
+    session.headers.update(DEFAULT_HEADERS)
+    if headers:
+        session.headers.update(headers)
+
+    adapter = HTTPAdapter(pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def get_session():
+    # une seule session (pool keep-alive) partagée par toutes les catégories et pages
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = make_session()
+        return _session
+
+def http_get(url, session=None, timeout=DEFAULT_TIMEOUT, **kwargs):
+    return (session or get_session()).get(url, timeout=timeout, **kwargs)
+
+
+# ================= PARSEUR HTML =================
+# lxml (C) si disponible, sinon le parseur pur Python de la bibliothèque standard
+try:
+    import lxml  # noqa: F401
+    DEFAULT_PARSER = "lxml"
+except ImportError:
+    DEFAULT_PARSER = "html.parser"
+
+CONTAINER_CLASSES = {
+    "vehicle": "listings-cards__list-item mb-md-3 mb-3",
+    "moto": "listing-card__content p-2",
+    "location": "listing-card__content p-2",
+}
+
+def make_soup(html, type_, parser=DEFAULT_PARSER, strain=True):
+    # strain=True : seuls les blocs d'annonces sont construits en arbre
+    only = SoupStrainer("div", class_=CONTAINER_CLASSES[type_]) if strain else None
+    return bs(html, parser, parse_only=only)
+
+
+# ================= EXTRACTION =================
+def annonce_id(url):
+    match = ANNONCE_RE.search(url or "")
+    return int(match.group(1)) if match else None
+
+# ================= PLANS D'EXTRACTION =================
+# Chaque catégorie a un plan compilé : les sélecteurs de tous ses champs sont regroupés
+# par nom de balise, et une seule traversée de la carte d'annonce remplit tous les champs
+# (au lieu d'un get_text + plusieurs find/find_all qui reparcourent chacun le sous-arbre).
+class Selector:
+
+    def __init__(self, tag, class_=None, href=None, many=False):
+        self.tag = tag
+        self.class_ = class_
+        self.href = href
+        self.many = many
+
+    def match(self, node):
+        if self.class_ is not None:
+            classes = node.get("class") or ()
+            # même règle que bs4 : "a b" compare l'attribut entier, "a" une des classes
+            if " " in self.class_:
+                if " ".join(classes) != self.class_:
+                    return False
+            elif self.class_ not in classes:
+                return False
+        if self.href is not None and not self.href.search(node.get("href") or ""):
+            return False
+        return True
+
+
+SELECTORS = {
+    "titre": Selector("h2"),
+    "prix": Selector("h3"),
+    "infos": Selector("li", many=True),
+    "adresse": Selector("div", class_="col-12 entry-zone-address"),
+    "lien": Selector("a", href=ANNONCE_RE),
+    "owner": Selector("span", class_="owner"),
+}
+
+
+class ExtractionPlan:
+
+    def __init__(self, fields, text=False):
+        # text=True : on garde aussi les textes de la carte (propriétaire après "Par ")
+        self.text = text
+        self.many = {f for f in fields if SELECTORS[f].many}
+        self.dispatch = {}
+        for field in fields:
+            self.dispatch.setdefault(SELECTORS[field].tag, []).append((field, SELECTORS[field]))
+
+    def collect(self, card):
+        found = {field: [] for field in self.many}
+        strings = []
+        dispatch = self.dispatch
+        for node in card.descendants:
+            name = node.name
+            if name is None:
+                if self.text and type(node) in TEXT_TYPES:
+                    text = node.strip()
+                    if text:
+                        strings.append(text)
+                continue
+            for field, selector in dispatch.get(name, ()):
+                if field in found and field not in self.many:
+                    continue
+                if selector.match(node):
+                    if field in self.many:
+                        found[field].append(node)
+                    else:
+                        found[field] = node
+        return found, strings
+
+
+TEXT_TYPES = (NavigableString, CData)
+
+PLANS = {
+    "vehicle": ExtractionPlan(["titre", "prix", "infos", "adresse", "lien"], text=True),
+    "moto": ExtractionPlan(["titre", "prix", "infos", "adresse", "lien"], text=True),
+    "location": ExtractionPlan(["titre", "prix", "adresse", "lien", "owner"]),
+}
+
+
+def proprietaire_from(strings):
+    txt = " ".join(strings)
+    if "Par " in txt:
+        return txt.split("Par ")[1].split("Appeler")[0].strip().title()
+    return "Inconnu"
+
+def build_record(type_, found, strings):
+    title = found["titre"].text.split()
+    adresse = found["adresse"].text.strip() if "adresse" in found else None
+    lien = found["lien"]["href"] if "lien" in found else None
+    record = {
+        "marque": title[0],
+        "annee": int(title[-1]),
+        "prix": int(found["prix"].text.replace(" F CFA", "").replace("\u202f", "")),
+        "adresse": adresse,
+    }
+
+    if type_ == "vehicle":
+        infos = found["infos"]
+        record["kilometrage"] = int(infos[1].text.replace(" km", "").replace("\u202f", ""))
+        record["boite"] = infos[2].text
+        record["carburant"] = infos[3].text
+        record["proprietaire"] = proprietaire_from(strings)
+
+    elif type_ == "moto":
+        infos = found["infos"]
+        record["kilometrage"] = int(infos[1].text.replace(" km", "").replace("\u202f", ""))
+        record["proprietaire"] = proprietaire_from(strings)
+
+    else:  # location
+        owner = found.get("owner")
+        record["proprietaire"] = owner.text.strip() if owner else "Inconnu"
+
+    record["url"] = lien
+    return record
+
+def extract_records(html, type_, parser=DEFAULT_PARSER, strain=True):
+    soup = make_soup(html, type_, parser, strain)
+    containers = soup.find_all("div", class_=CONTAINER_CLASSES[type_])
+    plan = PLANS[type_]
+
+    data = []
+    for c in containers:
+        try:
+            data.append(build_record(type_, *plan.collect(c)))
+        except Exception as e:
+            logging.warning(f"Erreur scraping : {e}")
+
+    return data
+
+def extract_new_records(html, type_, seen, parser=DEFAULT_PARSER, strain=True):
+    # comme extract_records, mais les annonces déjà dans `seen` (dedup.Reservation)
+    # sont écartées avant la construction de la ligne ; renvoie aussi le nombre de cartes
+    soup = make_soup(html, type_, parser, strain)
+    containers = soup.find_all("div", class_=CONTAINER_CLASSES[type_])
+    plan = PLANS[type_]
+
+    data = []
+    for c in containers:
+        try:
+            found, strings = plan.collect(c)
+            if "lien" in found and annonce_id(found["lien"]["href"]) in seen:
+                continue
+            data.append(build_record(type_, found, strings))
+        except Exception as e:
+            logging.warning(f"Erreur scraping : {e}")
+
+    return data, len(containers)
+
+def parse_listing(html, type_, parser=DEFAULT_PARSER, strain=True):
+    return pd.DataFrame(extract_records(html, type_, parser, strain))
+
+
+# ================= TELECHARGEMENT CONCURRENT =================
+def fetch(url, session=None, cache=None, throttle=None, archive=None):
+    status = 200
+
+    def get(u, **kwargs):
+        nonlocal status
+        if throttle is not None:
+            response = throttle.request(u, lambda: http_get(u, session, **kwargs))
+        else:
+            response = http_get(u, session, **kwargs)
+        # page d'erreur (404, 503...) : échec de téléchargement, ni archivée ni mise en cache
+        response.raise_for_status()
+        status = 200 if response.status_code == 304 else response.status_code
+        return response
+
+    try:
+        html = cache.fetch(url, get) if cache is not None else get(url).text
+    except Exception as e:
+        logging.warning(f"Erreur téléchargement {url} : {e}")
+        return ""
+
+    if archive is not None:
+        archive.store(url, html, status)
+    return html
+
+def fetch_pages(urls, workers=DEFAULT_WORKERS, session=None, cache=None, throttle=None, archive=None, share=None):
+    # pool de threads borné, au plus `workers` pages d'avance ; les pages sont rendues
+    # dans l'ordre des urls (qui peuvent être un générateur paresseux).
+    # share() : nombre de pages d'avance autorisé maintenant (au plus `workers`), peut
+    # changer pendant le crawl (crawl_categories)
+    session = session or get_session()
+    workers = max(1, workers)
+    share = share or (lambda: workers)
+    pool = ThreadPoolExecutor(max_workers=workers)
+    urls = iter(urls)
+    window = deque(pool.submit(fetch, url, session, cache, throttle, archive)
+                   for url in islice(urls, max(1, min(workers, share()))))
+    try:
+        while window:
+            html = window.popleft().result()
+            room = min(workers, share()) - len(window)
+            for url in islice(urls, max(room, 0 if window else 1)):
+                window.append(pool.submit(fetch, url, session, cache, throttle, archive))
+            yield html
+    finally:
+        # arrêt anticipé (annulation, mode incrémental) : on abandonne les pages pas encore parties
+        pool.shutdown(wait=True, cancel_futures=True)
+
+def open_sinks(jobs, sinks=None):
+    sinks = dict(sinks or {})
+    for type_, _ in jobs:
+        sinks.setdefault(type_, MemorySink())
+    return sinks
+
+def collect(sinks):
+    # un seul DataFrame par catégorie, construit à la fin
+    return {type_: sink.to_dataframe() for type_, sink in sinks.items()}
+
+def extract_page(html, type_, url=None, seen=None, fingerprints=None):
+    # (annonces, nombre de cartes) d'une page ; avec fingerprints (fingerprints.PageFingerprints),
+    # une page inchangée depuis le dernier passage n'est pas re-parsée
+    if fingerprints is not None and url:
+        records = fingerprints.extract(url, html, type_)
+        return records, len(records)
+    if seen is not None:
+        return extract_new_records(html, type_, seen)
+    records = extract_records(html, type_)
+    return records, len(records)
+
+def scrape_pages(jobs, workers=DEFAULT_WORKERS, on_page=None, session=None, cache=None, throttle=None, archive=None,
+                 sinks=None, seen=None, fingerprints=None):
+    # seen : annonces déjà ingérées (dedup.Reservation), rejetées avant écriture ; les nouvelles
+    # entrent dans l'index quand la sortie les écrit sur disque (RecordSink(on_flush=seen.commit))
+    # jobs : liste de (type_, page) ; les annonces sont écrites page par page dans les sinks
+    jobs = list(jobs)
+    sinks = open_sinks(jobs, sinks)
+    urls = [page_url(type_, page) for type_, page in jobs]
+
+    htmls = fetch_pages(urls, workers, session, cache, throttle, archive)
+    for i, ((type_, page), url, html) in enumerate(zip(jobs, urls, htmls)):
+        records = extract_page(html, type_, url, seen, fingerprints)[0]
+        sinks[type_].write(seen.claim(records) if seen is not None else records)
+        if on_page:
+            on_page(i + 1, len(jobs))
+
+    return collect(sinks)
+
+
+class _OrderedWriter:
+    # les pages finissent dans le désordre : on les remet dans l'ordre avant d'écrire.
+    # Avec une frontière, chaque page est marquée une fois ses annonces sur disque.
+
+    def __init__(self, jobs, sinks, seen=None, frontier=None, crawl=None):
+        self.jobs = jobs
+        self.sinks = sinks
+        self.seen = seen
+        self.frontier = frontier
+        self.crawl = crawl
+        self.buffer = {}
+        self.next = 0
+
+    def write(self, i, records, state=None):
+        # state : "failed" / "skipped", sinon "done", ou "end" pour une page sans annonce
+        # renvoie le nombre de pages écrites (0 tant qu'une page précédente manque)
+        self.buffer[i] = (records, state or ("done" if records else "end"))
+        written = 0
+        while self.next in self.buffer:
+            type_, page = self.jobs[self.next]
+            records, state = self.buffer.pop(self.next)
+            if self.seen is not None:
+                records = self.seen.claim(records)
+            self.sinks[type_].write(records)
+            if self.frontier is not None:
+                self.sinks[type_].flush()
+                self.frontier.mark(self.crawl, type_, page, state, len(records))
+                if state == "end":
+                    self.frontier.skip_after(self.crawl, type_, page)
+            self.next += 1
+            written += 1
+        return written
+
+
+# ================= PIPELINE TELECHARGEMENT / PARSING =================
+# Étage 1 : threads de téléchargement (I/O) -> file bornée de HTML brut
+# Étage 2 : pool de processus qui parse (CPU, hors GIL)
+# La file bornée et le nombre limité de tâches en cours gardent la mémoire stable.
+def _fetch_worker(todo, raw, session, cache, throttle, archive, stop, ended, ahead):
+    # ended : {catégorie: première page vide}, les pages suivantes ne sont pas téléchargées (html None).
+    # ahead : pages prises mais pas encore écrites ; si une page reste bloquée (reprises), les
+    # suivantes n'attendent pas indéfiniment en mémoire dans _OrderedWriter
+    while not stop.is_set():
+        if not ahead.acquire(timeout=0.5):
+            continue
+        try:
+            i, type_, page, url = todo.get_nowait()
+        except queue.Empty:
+            ahead.release()
+            return
+        try:
+            html = None if page > ended.get(type_, page) else fetch(url, session, cache, throttle, archive)
+        except Exception as e:
+            # erreur hors téléchargement (archive sur disque...) : la page échoue, le thread continue
+            logging.warning(f"Erreur téléchargement {url} : {e}")
+            html = ""
+        while not stop.is_set():
+            try:
+                raw.put((i, type_, html), timeout=0.5)
+                break
+            except queue.Full:
+                continue
+
+def _next_page(raw, threads, idle):
+    # chaque page prise produit un résultat ; en attendant, idle() écrit les pages déjà parsées
+    # (elles libèrent de la place aux threads) ; si plus aucun thread ne tourne, on ne bloque pas
+    while True:
+        try:
+            return raw.get(timeout=0.1)
+        except queue.Empty:
+            idle()
+            if not any(t.is_alive() for t in threads):
+                raise RuntimeError("téléchargements interrompus : plus aucun thread actif")
+
+def scrape_pipeline(jobs, fetch_workers=DEFAULT_WORKERS, parse_workers=None, queue_size=None,
+                    on_page=None, session=None, cache=None, throttle=None, archive=None, sinks=None, seen=None,
+                    fingerprints=None, frontier=None, crawl=None, max_ahead=None):
+    # frontier : comme crawl_category, seules les pages en attente sont téléchargées et
+    # l'état de chaque page est enregistré (reprise possible)
+    jobs = list(jobs)
+    sinks = open_sinks(jobs, sinks)
+    if frontier is not None:
+        for type_ in dict.fromkeys(type_ for type_, _ in jobs):
+            frontier.add(crawl, type_, [p for t, p in jobs if t == type_], page_url)
+            frontier.resume(crawl, type_)
+        waiting = {(type_, p) for type_ in sinks for p in frontier.pending(crawl, type_)}
+        jobs = [job for job in jobs if job in waiting]
+    parse_workers = parse_workers or os.cpu_count() or 1
+    session = session or get_session()
+
+    urls = [page_url(type_, page) for type_, page in jobs]
+    todo = queue.Queue()
+    for i, ((type_, page), url) in enumerate(zip(jobs, urls)):
+        todo.put((i, type_, page, url))
+    raw = queue.Queue(maxsize=queue_size or 2 * parse_workers)
+    stop = threading.Event()
+    # comme crawl_category : une catégorie s'arrête à sa première page vide, les autres continuent
+    ended = {}
+    ahead = threading.Semaphore(max_ahead or 2 * (fetch_workers + raw.maxsize + 2 * parse_workers))
+
+    threads = [threading.Thread(target=_fetch_worker,
+                                args=(todo, raw, session, cache, throttle, archive, stop, ended, ahead), daemon=True)
+               for _ in range(max(1, min(fetch_workers, len(jobs))))]
+    for t in threads:
+        t.start()
+
+    # les processus de parsing n'ont pas l'index : le dédoublonnage se fait à l'écriture
+    writer = _OrderedWriter(jobs, sinks, seen, frontier, crawl)
+    pending = {}
+    done = 0
+
+    def finish(i, records, digest=None, state=None):
+        nonlocal done
+        if digest is not None:
+            fingerprints.put(urls[i], digest, records)
+        type_, page = jobs[i]
+        if state is None and not records:
+            ended[type_] = min(page, ended.get(type_, page))
+        for _ in range(writer.write(i, records, state)):
+            ahead.release()
+        done += 1
+        if on_page:
+            on_page(done, len(jobs))
+
+    def harvest(block=False):
+        finished = wait(pending, return_when=FIRST_COMPLETED)[0] if block else [f for f in pending if f.done()]
+        for future in finished:
+            i, digest = pending.pop(future)
+            finish(i, future.result(), digest)
+
+    try:
+        with ProcessPoolExecutor(max_workers=parse_workers) as pool:
+            for _ in range(len(jobs)):
+                i, type_, html = _next_page(raw, threads, harvest)
+                if html is None:
+                    finish(i, [], state="skipped")
+                    continue
+                if not html:
+                    # échec de téléchargement (déjà journalisé) : ce n'est pas la fin de la catégorie
+                    finish(i, [], state="failed")
+                    continue
+                digest = None
+                if fingerprints is not None:
+                    # page inchangée : annonces reprises sans passer par le pool de parsing
+                    digest, records = fingerprints.lookup(urls[i], html)
+                    if records is not None:
+                        finish(i, records)
+                        continue
+                pending[pool.submit(extract_records, html, type_)] = (i, digest)
+
+                # pas plus de 2 pages par processus en attente
+                while len(pending) >= 2 * parse_workers:
+                    harvest(block=True)
+
+            for future in list(pending):
+                i, digest = pending.pop(future)
+                finish(i, future.result(), digest)
+    finally:
+        stop.set()
+
+    return collect(sinks)
+
+
+# ================= CRAWL INCREMENTAL =================
+def known_annonce_ids(paths):
+    # index des annonces déjà présentes dans les CSV (Data/ et exports précédents)
+    ids = set()
+    for path in paths:
+        try:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    ids.update(int(i) for i in ANNONCE_RE.findall(line))
+        except OSError:
+            continue
+    return ids
+
+def crawl_category(type_, max_pages, known_ids=None, workers=DEFAULT_WORKERS,
+                   session=None, cache=None, throttle=None, archive=None, on_page=None, sink=None, first_page=1,
+                   frontier=None, crawl=None, seen=None, fingerprints=None, share=None):
+    # Les annonces sont triées de la plus récente à la plus ancienne : en mode
+    # incrémental on s'arrête dès qu'une page ne contient que des annonces connues.
+    # Une page vide marque la fin de la catégorie.
+    # Avec une frontière (frontier.Frontier), seules les pages encore en attente sont
+    # crawlées et l'état de chaque page est enregistré : le crawl peut être repris.
+    sink = sink or MemorySink()
+    pages = range(first_page, max_pages + 1)
+    if frontier is not None:
+        frontier.add(crawl, type_, pages, page_url)
+        frontier.resume(crawl, type_)
+        pages = frontier.pending(crawl, type_)
+
+    def urls():
+        for p in pages:
+            if frontier is not None:
+                frontier.mark(crawl, type_, p, "in_flight")
+            yield page_url(type_, p)
+
+    def finish(page, state, records=0):
+        if frontier is not None:
+            sink.flush()   # les annonces sont sur disque avant que la page soit marquée faite
+            frontier.mark(crawl, type_, page, state, records)
+            if state in ("end", "skipped"):
+                frontier.skip_after(crawl, type_, page)
+
+    with closing(fetch_pages(urls(), workers, session, cache, throttle, archive, share)) as htmls:
+        for page, html in zip(pages, htmls):
+            if on_page:
+                on_page(page, max_pages)
+            if not html:
+                # échec de téléchargement (déjà journalisé) : ce n'est pas la fin de la catégorie
+                finish(page, "failed")
+                continue
+            records, cards = extract_page(html, type_, page_url(type_, page), seen, fingerprints)
+            if not cards:
+                # vraie page vide (un échec de téléchargement arrive ici comme "" et est traité plus haut)
+                finish(page, "end")
+                break
+            if known_ids is not None:
+                records = [r for r in records if annonce_id(r.get("url")) not in known_ids]
+                if not records:
+                    finish(page, "skipped")
+                    break
+            if seen is not None:
+                # une annonce peut aussi glisser d'une page à l'autre pendant le crawl
+                records = seen.claim(records)
+            sink.write(records)
+            finish(page, "done", len(records))
+
+    return sink.to_dataframe()
+
+
+# ================= ORDONNANCEUR MULTI-CATEGORIES =================
+def allocate_shares(plans, workers=DEFAULT_WORKERS):
+    # part du parallélisme proportionnelle au nombre de pages, au moins 1 par catégorie ;
+    # le total ne dépasse pas `workers` (plus grands restes), sauf s'il y a plus de catégories
+    if not plans:
+        return {}
+    weights = plans if sum(plans.values()) > 0 else dict.fromkeys(plans, 1)
+    total = sum(weights.values())
+    spare = max(0, workers - len(plans))
+    exact = {type_: spare * pages / total for type_, pages in weights.items()}
+    shares = {type_: 1 + int(part) for type_, part in exact.items()}
+    left = spare - sum(int(part) for part in exact.values())
+    for type_ in sorted(exact, key=lambda t: exact[t] - int(exact[t]), reverse=True)[:left]:
+        shares[type_] += 1
+    return shares
+
+def crawl_categories(plans, workers=DEFAULT_WORKERS, known_ids=None, shares=None, session=None,
+                     cache=None, throttle=None, archive=None, on_page=None, sinks=None, frontier=None, crawl=None,
+                     seen=None, first_page=1, fingerprints=None):
+    # plans : {type_: nombre max de pages}. Chaque catégorie a sa propre file, sa part de
+    # workers et sa condition d'arrêt ; elles avancent en parallèle, la durée totale est
+    # celle de la plus longue et non la somme. La part d'une catégorie terminée est
+    # redistribuée aux catégories encore en cours.
+    shares = dict(shares or allocate_shares(plans, workers))
+    budget = sum(shares.values())
+    sinks = sinks or {}
+    done = dict.fromkeys(plans, 0)
+    total = sum(max(0, pages - first_page + 1) for pages in plans.values())
+    lock = threading.Lock()
+
+    def progress(type_):
+        def callback(page, _):
+            with lock:
+                done[type_] = page - first_page + 1
+                count = sum(done.values())
+            if on_page:
+                on_page(count, total)
+        return callback
+
+    def run(type_, max_pages):
+        # chaque catégorie peut monter jusqu'au budget total, sa part actuelle la limite
+        try:
+            return crawl_category(type_, max_pages, known_ids, budget, session, cache, throttle, archive,
+                                  progress(type_), sinks.get(type_), first_page, frontier=frontier, crawl=crawl,
+                                  seen=seen, fingerprints=fingerprints, share=lambda: shares.get(type_, 1))
+        finally:
+            with lock:
+                shares.pop(type_, None)
+                if shares:
+                    shares.update(allocate_shares({t: plans[t] for t in shares}, budget))
+
+    with ThreadPoolExecutor(max_workers=len(plans) or 1) as pool:
+        futures = {type_: pool.submit(run, type_, max_pages) for type_, max_pages in plans.items()}
+        return {type_: future.result() for type_, future in futures.items()}
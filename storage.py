@@ -0,0 +1,124 @@
+from pathlib import Path
+import pandas as pd
+import csv
+
+# Parquet optionnel (pyarrow) ; le CSV fonctionne toujours
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+DEFAULT_BATCH_SIZE = 1000
+
+INT_FIELDS = {"annee", "prix", "kilometrage"}
+
+
+# ================= ECRITURE EN FLUX =================
+class RecordSink:
+    # Ajoute les annonces au fichier par lots : la mémoire ne dépend pas du nombre de pages,
+    # le DataFrame n'est construit qu'une fois, à la fin (to_dataframe).
+
+    def __init__(self, path, fmt=None, batch_size=DEFAULT_BATCH_SIZE, append=False, on_flush=None):
+        # on_flush(annonces) : appelé une fois le lot écrit dans le fichier
+        self.path = Path(path)
+        self.on_flush = on_flush
+        self.fmt = fmt or ("parquet" if self.path.suffix == ".parquet" else "csv")
+        if self.fmt == "parquet" and pa is None:
+            raise ImportError("pyarrow est nécessaire pour écrire du Parquet")
+        self.batch_size = batch_size
+        self.count = 0
+        self._batch = []
+        self._fields = None
+        self._file = None
+        self._writer = None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.append = append and self.path.exists() and self.path.stat().st_size > 0
+        if self.append and self.fmt != "csv":
+            raise ValueError("la reprise (append) n'est possible qu'en CSV")
+        if self.path.exists() and not self.append:
+            self.path.unlink()
+
+    def write(self, records):
+        self._batch.extend(records)
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._batch:
+            return
+        if self._fields is None:
+            self._fields = list(dict.fromkeys(k for r in self._batch for k in r))
+        if self.fmt == "parquet":
+            self._flush_parquet()
+        else:
+            self._flush_csv()
+        self.count += len(self._batch)
+        if self.on_flush is not None:
+            self.on_flush(self._batch)
+        self._batch = []
+
+    def _flush_csv(self):
+        if self._file is None:
+            if self.append:
+                # reprise : on garde les colonnes (et l'en-tête) du fichier existant
+                with open(self.path, newline="", encoding="utf-8") as f:
+                    self._fields = next(csv.reader(f))
+                self._file = open(self.path, "a", newline="", encoding="utf-8")
+                self._writer = csv.DictWriter(self._file, fieldnames=self._fields, extrasaction="ignore")
+            else:
+                self._file = open(self.path, "w", newline="", encoding="utf-8")
+                self._writer = csv.DictWriter(self._file, fieldnames=self._fields, extrasaction="ignore")
+                self._writer.writeheader()
+        self._writer.writerows(self._batch)
+        self._file.flush()
+
+    def _flush_parquet(self):
+        if self._writer is None:
+            schema = pa.schema([(f, pa.int64() if f in INT_FIELDS else pa.string()) for f in self._fields])
+            self._writer = pq.ParquetWriter(self.path, schema)
+        table = pa.Table.from_pylist(self._batch, schema=self._writer.schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+        elif self._writer is not None:
+            self._writer.close()
+        self._file = self._writer = None
+
+    def to_dataframe(self):
+        self.close()
+        if not self.path.exists():
+            return pd.DataFrame()
+        if self.fmt == "parquet":
+            return pd.read_parquet(self.path)
+        return pd.read_csv(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class MemorySink:
+    # même interface, en mémoire (petits scrapings)
+
+    def __init__(self):
+        self.records = []
+        self.count = 0
+
+    def write(self, records):
+        self.records.extend(records)
+        self.count += len(records)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def to_dataframe(self):
+        return pd.DataFrame(self.records)
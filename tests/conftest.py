@@ -0,0 +1,50 @@
+from pathlib import Path
+import sys
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import scraper
+import datasets
+from fixture_server import start_server
+from throttle import Throttle
+from frontier import Frontier
+from dedup import AnnonceIndex
+from delta import DeltaStore
+from enrich import DetailStore
+from listings import ListingsDB
+
+# Tests hors ligne : le scraper vise le faux dakar-auto.com local (fixture_server.py),
+# tous les fichiers (exports, frontière, index, historique, Data/) vont dans tmp_path.
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = start_server(last_pages={"location": 10, "moto": 8})
+    monkeypatch.setattr(scraper, "BASE_URL", server.base_url)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def stores(tmp_path, monkeypatch):
+    # jamais le vrai Data/ du dépôt
+    monkeypatch.setattr(datasets, "DATA_DIR", tmp_path / "Data")
+    monkeypatch.setattr(datasets, "TYPED_DIR", tmp_path / "Data" / "typed")
+    (tmp_path / "Data").mkdir()
+    return {
+        "frontier": Frontier(tmp_path / "frontier.sqlite"),
+        "index": AnnonceIndex(tmp_path / "annonce_ids.bin"),
+        "deltas": DeltaStore(tmp_path / "deltas.sqlite"),
+        "details": DetailStore(tmp_path / "details.sqlite"),
+        "listings": ListingsDB(tmp_path / "listings.sqlite"),
+        "outputs": {type_: tmp_path / f"{type_}.csv" for type_ in scraper.CATEGORIES},
+    }
+
+
+@pytest.fixture
+def throttle():
+    # pas de reprise : une page en erreur échoue tout de suite
+    return Throttle(rate=1000, retries=0)
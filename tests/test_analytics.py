@@ -0,0 +1,47 @@
+import pandas as pd
+import pytest
+
+from analytics import Analytics
+from fixture_server import synthetic_page
+from listings import ListingsDB
+from scraper import extract_records
+
+# Les dashboards lisent DuckDB quand il est installé : mêmes résultats que la base SQLite,
+# y compris après des mises à jour (synchronisation incrémentale).
+
+pytest.importorskip("duckdb")
+
+FILTERS = [{}, {"marque": "Toyota"}, {"annee": (2010, 2020)}, {"prix": (None, 10_000_000)},
+           {"marque": "Peugeot", "annee": (2005, None)}]
+
+
+def records(type_, pages, seed=0):
+    return [r for page in pages for r in extract_records(synthetic_page(type_, page, seed=seed), type_)]
+
+
+def assert_same(listings, analytics):
+    assert analytics.engine == "duckdb"
+    for type_ in ("vehicle", "moto"):
+        for filters in FILTERS:
+            expected, got = listings.price_stats(type_, **filters), analytics.price_stats(type_, **filters)
+            assert got == pytest.approx(expected, nan_ok=True)
+            for column in ("marque", "annee", "adresse"):
+                pd.testing.assert_frame_equal(analytics.top(type_, column, **filters),
+                                              listings.top(type_, column, **filters), check_dtype=False)
+
+
+def test_duckdb_matches_sqlite(tmp_path):
+    listings = ListingsDB(tmp_path / "listings.sqlite")
+    listings.upsert("vehicle", records("vehicle", range(1, 11)))
+    listings.upsert("moto", records("moto", range(1, 6)))
+    analytics = Analytics(listings, tmp_path / "listings.duckdb")
+    assert_same(listings, analytics)
+
+    # nouveaux prix sur des annonces connues + nouvelles annonces
+    listings.upsert("vehicle", records("vehicle", range(5, 16), seed=1))
+    assert_same(listings, analytics)
+
+    # réouverture : la copie DuckDB sur disque reprend là où elle en était
+    analytics._con.close()
+    listings.upsert("moto", records("moto", range(3, 9), seed=2))
+    assert_same(listings, Analytics(listings, tmp_path / "listings.duckdb"))
@@ -0,0 +1,64 @@
+import time
+
+import pandas as pd
+import pytest
+
+from catalog import LastPageUnknown, crawl_catalog, discover_last_page
+from jobs import JobCancelled
+
+# Catalogue complet : découverte de la dernière page et crawl par shards.
+
+
+def test_failed_probe_is_not_the_last_page(server, throttle):
+    server.last_pages["moto"] = 60
+    assert discover_last_page("moto", throttle=throttle) == 60
+    server.page_errors[("moto", 60)] = 503
+    with pytest.raises(LastPageUnknown):
+        discover_last_page("moto", throttle=throttle)
+
+
+def test_catalog_reports_pages_and_can_be_cancelled(server, tmp_path, throttle):
+    server.last_pages["moto"] = 200
+    server.latency = 0.02
+    seen = []
+
+    def on_page(done, total):
+        seen.append(done)
+        if done >= 20:
+            raise JobCancelled()
+
+    start = time.monotonic()
+    with pytest.raises(JobCancelled):
+        crawl_catalog("moto", tmp_path, shards=2, workers=2, throttle=throttle, on_page=on_page)
+    assert time.monotonic() - start < 10
+    assert 0 < seen[-1] < 200
+
+
+def test_catalog_crawls_every_page(server, tmp_path, throttle):
+    path, rows = crawl_catalog("moto", tmp_path, shards=3, workers=2, throttle=throttle)
+    assert rows == 8 * 20
+    assert not list(tmp_path.glob("*_shard*.csv"))
+
+
+def test_interrupted_catalog_resumes_its_shards(server, stores, tmp_path, throttle):
+    server.last_pages["moto"] = 30
+    server.latency = 0.02
+    frontier = stores["frontier"]
+
+    def on_page(done, total):
+        if done >= 10:
+            raise JobCancelled()
+
+    server.page_errors[("moto", 25)] = 503
+    with pytest.raises(JobCancelled):
+        crawl_catalog("moto", tmp_path / "catalog", shards=3, workers=2, throttle=throttle, frontier=frontier,
+                      on_page=on_page)
+    assert any(frontier.unfinished(crawl) for crawl in frontier.crawls("catalog/moto#"))
+    path, rows = crawl_catalog("moto", tmp_path / "catalog", shards=3, workers=2, throttle=throttle,
+                               frontier=frontier)
+    assert rows == 29 * 20
+    server.page_errors.clear()
+    path, rows = crawl_catalog("moto", tmp_path / "catalog", shards=3, workers=2, throttle=throttle,
+                               frontier=frontier)
+    df = pd.read_csv(path)
+    assert rows == len(df) == 30 * 20 and df["url"].is_unique
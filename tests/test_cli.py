@@ -0,0 +1,12 @@
+from frontier import FRONTIER_PATH
+from scrape_cli import parse_args
+
+# Ligne de commande : lancée par cron depuis n'importe quel répertoire, elle partage
+# les fichiers de l'application.
+
+
+def test_cli_defaults_do_not_depend_on_the_working_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    args = parse_args([])
+    assert args.cache_dir == FRONTIER_PATH.parent
+    assert args.cache_dir.is_absolute()
@@ -0,0 +1,61 @@
+import os
+
+import pandas as pd
+
+import datasets
+from datasets import VEHICULE_COLUMNS, normalize_vehicule
+
+# Normalisation de l'export Web Scraper cassé Data/Vehicule.csv : Latin-1, ordre et URL de
+# départ collés dans le premier champ, virgules dans MARQUE.
+
+HEADER = b"web_scraper_order,web_scraper_start_url,MARQUE,ANNEE,PRIX,ADRESSE,KILOMETRAGE,BOITE,CARBURANT,PROPRIETAIRE\r\n"
+LATIN1 = (b'"1767475268-1,https://dakar-auto.com/senegal/voitures-4?&page=2773""",'
+          b"https://dakar-auto.com/senegal/voitures/occasion/citadines/peugeot/308/annonce-81791,"
+          b"Peugeot 308 2009 Dakar,Ann\xe9e: 2009,10500000 F CFA,Grand-Dakar,50000 km,Manuelle,Diesel,Samuel FALL\r\n")
+UTF8 = ('"1767475271-2,https://dakar-auto.com/senegal/voitures-4?&page=2773""",'
+        "https://dakar-auto.com/senegal/voitures/occasion/citadines/peugeot/307/annonce-81790,"
+        "Peugeot 307 2010 Dakar,Année: 2010,7500000 F CFA,Almadies,80000 km,Automatique,Essence,Awa NDIAYE\r\n").encode()
+COMMAS = (b'"1767492687-3785,https://dakar-auto.com/senegal/voitures-4?&page=2582""",'
+          b"https://dakar-auto.com/senegal/voitures/occasion/4x4s-and-suv/toyota/nissan-toyota-honda/annonce-85927,"
+          b"Toyota Nissan,Toyota,Honda 0 Dakar,,NC,Grand-Dakar,,Automatique,Essence,Alex FONTAINE\r\n")
+
+
+def normalize(tmp_path, *rows):
+    src, dst = tmp_path / "Vehicule.csv", tmp_path / "Vehicule.normalise.csv"
+    src.write_bytes(HEADER + b"".join(rows))
+    counts = normalize_vehicule(src, dst)
+    return counts, pd.read_csv(dst, dtype=str, keep_default_na=False, encoding="utf-8")
+
+
+def test_latin1_and_glued_start_url(tmp_path):
+    (rows, repaired), df = normalize(tmp_path, LATIN1, UTF8)
+    assert (rows, repaired) == (2, 0)
+    assert list(df.columns) == VEHICULE_COLUMNS
+    first = df.iloc[0]
+    assert first["web_scraper_order"] == "1767475268-1"
+    assert first["web_scraper_start_url"] == "https://dakar-auto.com/senegal/voitures-4?&page=2773"
+    assert first["URL"].endswith("annonce-81791")
+    assert first["ANNEE"] == "Année: 2009"
+    assert df.iloc[1]["ANNEE"] == "Année: 2010"
+    assert df.iloc[1]["PROPRIETAIRE"] == "Awa NDIAYE"
+
+
+def test_commas_in_marque(tmp_path):
+    (rows, repaired), df = normalize(tmp_path, LATIN1, COMMAS)
+    assert (rows, repaired) == (2, 1)
+    row = df.iloc[1]
+    assert row["MARQUE"] == "Toyota Nissan,Toyota,Honda 0 Dakar"
+    assert [row[c] for c in VEHICULE_COLUMNS[4:]] == ["", "NC", "Grand-Dakar", "", "Automatique", "Essence",
+                                                      "Alex FONTAINE"]
+
+
+def test_source_is_normalised_again_when_the_export_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(datasets, "DATA_DIR", tmp_path)
+    (tmp_path / "Vehicule.csv").write_bytes(HEADER + LATIN1)
+    path = datasets.source_path("vehicle")
+    assert len(pd.read_csv(path)) == 1
+
+    (tmp_path / "Vehicule.csv").write_bytes(HEADER + LATIN1 + COMMAS)
+    stat = path.stat()
+    os.utime(tmp_path / "Vehicule.csv", (stat.st_atime, stat.st_mtime + 10))
+    assert len(pd.read_csv(datasets.source_path("vehicle"))) == 2
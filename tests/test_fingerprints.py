@@ -0,0 +1,22 @@
+import fingerprints
+import scraper
+from fingerprints import PageFingerprints, extraction_version
+from fixture_server import synthetic_page
+
+# Pages inchangées : les annonces gardées ne valent que pour la version d'extraction qui les a produites.
+
+
+def test_new_extraction_reparses_unchanged_pages(tmp_path, monkeypatch):
+    store = PageFingerprints(tmp_path / "fingerprints.sqlite")
+    html = synthetic_page("moto", 1)
+    store.extract("page-1", html, "moto")
+    store.extract("page-1", html, "moto")
+    assert store.stats() == {"hits": 1, "misses": 1}
+
+    # correction d'un sélecteur / nouveau champ
+    monkeypatch.setitem(scraper.PLANS, "moto", scraper.ExtractionPlan(["titre", "prix", "infos", "lien"], text=True))
+    version = extraction_version()
+    assert version != fingerprints.EXTRACTION_VERSION
+    monkeypatch.setattr(fingerprints, "EXTRACTION_VERSION", version)
+    store.extract("page-1", html, "moto")
+    assert store.stats() == {"hits": 1, "misses": 2}
@@ -0,0 +1,19 @@
+import threading
+
+from jobs import JobManager
+
+# Tâches en arrière-plan : un seul scraping à la fois (mêmes exports, même frontière).
+
+
+def test_exclusive_job_is_refused_while_another_runs():
+    manager = JobManager()
+    release = threading.Event()
+    first = manager.submit("a", lambda job: release.wait(5), exclusive=True)
+    assert manager.submit("b", lambda job: None, exclusive=True) is None
+
+    release.set()
+    first.thread.join(5)
+    second = manager.submit("c", lambda job: None, exclusive=True)
+    assert second is not None
+    second.thread.join(5)
+    assert [j.label for j in manager.list()] == ["c", "a"]
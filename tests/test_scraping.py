@@ -0,0 +1,217 @@
+import time
+
+import pandas as pd
+import pytest
+
+import datasets
+import scraper
+from scraper import allocate_shares, annonce_id, scrape_pipeline
+from dedup import AnnonceIndex
+from jobs import Job, JobCancelled
+from runner import crawl_id, run_scrape
+
+# Régressions du scraping contre le serveur local : page en erreur au milieu d'un crawl,
+# passes incrémentales répétées, annulation puis dédoublonnage, pages détail en erreur, reprise.
+
+LOCATION = crawl_id(["location"], 12)
+
+
+class CancelAfter(Job):
+    # annule la tâche à mi-parcours
+
+    def __init__(self, fraction=0.5):
+        super().__init__("annulée")
+        self.fraction = fraction
+
+    def on_progress(self, done, total):
+        if total and done / total >= self.fraction:
+            self.cancel()
+        super().on_progress(done, total)
+
+
+def scrape(stores, throttle, mode, selected=("location",), pages=12, multiprocess=False, dedup=False,
+           history=False, job=None):
+    job = job or Job(mode)
+    results = run_scrape(job, list(selected), pages, mode, 4, None, throttle, None, multiprocess,
+                         frontier=stores["frontier"], seen=stores["index"] if dedup else None,
+                         deltas=stores["deltas"] if history else None, known=stores["index"],
+                         outputs=stores["outputs"], details=stores["details"], listings=stores["listings"],
+                         catalog_dir=stores["outputs"]["moto"].parent / "catalog")
+    return job, results
+
+def export(stores, type_="location"):
+    path = stores["outputs"][type_]
+    if not path.exists() or not path.stat().st_size:
+        return pd.DataFrame(columns=["url"])
+    return pd.read_csv(path)
+
+
+# ================= PAGE EN ERREUR =================
+@pytest.mark.parametrize("multiprocess", [False, True])
+def test_error_page_is_a_failure_not_the_end(server, stores, throttle, multiprocess):
+    scrape(stores, throttle, "full", multiprocess=multiprocess, history=True)
+    server.page_errors[("location", 3)] = 503
+    job, results = scrape(stores, throttle, "full", multiprocess=multiprocess, history=True)
+
+    status = stores["frontier"].status(LOCATION, "location")
+    assert status["failed"] == (1, 0)
+    assert status["done"] == (9, 180)
+    assert len(results["location"]) == 180
+    # crawl incomplet : aucune annonce déclarée disparue
+    assert not stores["frontier"].complete(LOCATION, "location")
+    assert stores["deltas"].stats().get("delete", 0) == 0
+    assert stores["frontier"].unfinished(LOCATION)
+
+
+@pytest.mark.parametrize("multiprocess", [False, True])
+def test_complete_crawl_sweeps_disappeared_annonces(server, stores, throttle, multiprocess):
+    scrape(stores, throttle, "full", multiprocess=multiprocess, history=True)
+    server.last_pages["location"] = 9
+    scrape(stores, throttle, "full", multiprocess=multiprocess, history=True)
+    assert stores["frontier"].complete(LOCATION, "location")
+    assert stores["deltas"].stats()["delete"] == 20
+
+
+def test_catalog_sweeps_only_a_complete_catalog(server, stores, throttle):
+    scrape(stores, throttle, "catalog", selected=("moto",), history=True)
+    server.last_pages["moto"] = 6
+    server.page_errors[("moto", 3)] = 503
+    scrape(stores, throttle, "catalog", selected=("moto",), history=True)
+    assert stores["deltas"].stats().get("delete", 0) == 0
+
+    server.page_errors.clear()
+    scrape(stores, throttle, "catalog", selected=("moto",), history=True)   # reprise du catalogue
+    assert stores["deltas"].stats()["delete"] == 40
+    assert len(export(stores, "moto")) == 120
+
+
+def test_pipeline_stops_each_category_at_its_end(server, stores, throttle):
+    server.last_pages["location"] = 9
+    scrape(stores, throttle, "full", selected=("moto", "location"), pages=40, multiprocess=True)
+    # 9 + 10 pages utiles (dont les pages vides de fin), plus au plus une fenêtre de pages déjà parties
+    assert server.requests <= 19 + 2 * 4
+    crawl = crawl_id(["moto", "location"], 40)
+    assert stores["frontier"].complete(crawl, "moto") and stores["frontier"].complete(crawl, "location")
+    assert len(export(stores, "moto")) == 160 and len(export(stores)) == 180
+
+
+class BrokenArchive:
+    # disque plein : l'archivage échoue après le téléchargement
+
+    def store(self, url, html, status):
+        raise OSError("No space left on device")
+
+
+def test_pipeline_survives_errors_outside_the_download(server, throttle):
+    jobs = [("moto", p) for p in range(1, 9)]
+    results = scrape_pipeline(jobs, 4, throttle=throttle, archive=BrokenArchive())
+    assert results["moto"].empty
+
+
+def test_pipeline_keeps_pages_in_order_behind_a_slow_page(server, throttle, monkeypatch):
+    fetch = scraper.fetch
+
+    def slow_first_page(url, *args):
+        if url.endswith("page=1"):
+            time.sleep(0.5)
+        return fetch(url, *args)
+
+    monkeypatch.setattr(scraper, "fetch", slow_first_page)
+    jobs = [("moto", p) for p in range(1, 9)]
+    results = scrape_pipeline(jobs, 4, throttle=throttle, max_ahead=2)
+    assert len(results["moto"]) == 160 and results["moto"]["url"].is_unique
+
+
+# ================= REPRISE =================
+@pytest.mark.parametrize("multiprocess", [False, True])
+def test_resume_after_error_page(server, stores, throttle, multiprocess):
+    server.page_errors[("location", 3)] = 503
+    scrape(stores, throttle, "full", multiprocess=multiprocess)
+    server.page_errors.clear()
+    scrape(stores, throttle, "resume")
+
+    df = export(stores)
+    assert len(df) == 200 and df["url"].is_unique
+    assert stores["frontier"].complete(LOCATION, "location")
+
+
+@pytest.mark.parametrize("multiprocess", [False, True])
+def test_resume_after_cancel(server, stores, throttle, multiprocess):
+    with pytest.raises(JobCancelled):
+        scrape(stores, throttle, "full", multiprocess=multiprocess, job=CancelAfter())
+    assert stores["frontier"].unfinished(LOCATION)
+    scrape(stores, throttle, "resume")
+
+    df = export(stores)
+    assert len(df) == 200 and df["url"].is_unique
+    assert not stores["frontier"].unfinished(LOCATION)
+
+
+# ================= INCREMENTAL / DEDOUBLONNAGE =================
+def test_repeated_incremental_runs_do_not_duplicate(server, stores, throttle):
+    for _ in range(3):
+        scrape(stores, throttle, "incremental", selected=("moto",), pages=10)
+    df = export(stores, "moto")
+    assert len(df) == 160 and df["url"].is_unique
+
+
+@pytest.mark.parametrize("multiprocess", [False, True])
+def test_incremental_after_full_run_without_dedup(server, stores, throttle, multiprocess):
+    scrape(stores, throttle, "full", selected=("moto",), pages=10, multiprocess=multiprocess)
+    scrape(stores, throttle, "incremental", selected=("moto",), pages=10)
+    df = export(stores, "moto")
+    assert len(df) == 160 and df["url"].is_unique
+
+
+@pytest.mark.parametrize("mode, multiprocess", [("incremental", False), ("full", False), ("full", True)])
+def test_cancelled_run_does_not_lose_annonces(server, stores, throttle, mode, multiprocess):
+    with pytest.raises(JobCancelled):
+        scrape(stores, throttle, mode, selected=("moto",), pages=8, multiprocess=multiprocess, dedup=True,
+               job=CancelAfter())
+    # seules les annonces écrites sont dans l'index
+    assert len(AnnonceIndex(stores["index"].path)) == len(export(stores, "moto"))
+
+    scrape(stores, throttle, "incremental" if mode == "incremental" else "resume", selected=("moto",), pages=8,
+           dedup=True)
+    df = export(stores, "moto")
+    assert len(df) == 160 and df["url"].is_unique
+
+
+def test_worker_shares_are_capped():
+    shares = allocate_shares({"vehicle": 50, "moto": 50, "location": 50}, 8)
+    assert sum(shares.values()) == 8 and min(shares.values()) >= 2
+
+
+# ================= PAGES DETAIL =================
+def test_detail_error_pages_are_retried(server, stores, throttle):
+    scrape(stores, throttle, "full", pages=2)   # locations : ni boîte ni carburant sur les cartes
+    ids = [annonce_id(url) for url in export(stores)["url"]]
+    for id_ in ids[:5]:
+        server.detail_errors[id_] = 404
+
+    scrape(stores, throttle, "enrich", pages=2)
+    assert len(stores["details"]) == len(ids) - 5
+
+    server.detail_errors.clear()
+    scrape(stores, throttle, "enrich", pages=2)
+    assert len(stores["details"]) == len(ids)
+    df = export(stores)
+    assert df["boite"].notna().all() and df["carburant"].notna().all()
+
+
+def test_enrich_fills_data_dataset_and_listings(server, stores, throttle):
+    pd.DataFrame([{
+        "web_scraper_order": f"1-{i}",
+        "web_scraper_start_url": "https://dakar-auto.com/senegal/motos-and-scooters-3?&page=1",
+        "URL": f"https://dakar-auto.com/senegal/motos-and-scooters/occasion/motos/honda/vf/annonce-{90000 + i}",
+        "MARQUE": "Honda VF 0 Dakar", "PRIX": "250 000 F CFA", "ADRESSE": "Dakar",
+        "ANNEE": "", "KILOMETRAGE": "", "PROPRIETAIRE": "Parking",
+    } for i in range(10)]).to_csv(datasets.DATA_DIR / "Moto.csv", index=False)
+
+    scrape(stores, throttle, "enrich", selected=("moto",), pages=1)
+
+    data = pd.read_csv(datasets.DATA_DIR / "Moto.csv")
+    assert data["ANNEE"].notna().all() and data["KILOMETRAGE"].notna().all()
+    listings = stores["listings"].query("moto")
+    assert len(listings) == 10
+    assert listings["annee"].notna().all()
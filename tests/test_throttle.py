@@ -0,0 +1,78 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+import pytest
+import requests
+
+from throttle import CircuitBreaker, HostThrottle
+
+# Disjoncteur et surcharge : une page demandée pendant le refroidissement attend au lieu d'échouer.
+
+
+class Response:
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.headers = {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code}")
+
+
+def test_open_breaker_waits_for_the_cooldown():
+    breaker = CircuitBreaker(threshold=1, cooldown=0.2)
+    breaker.on_failure()
+    start = time.monotonic()
+    breaker.before_call()
+    assert time.monotonic() - start >= 0.15
+    breaker.on_success()
+    assert breaker.state == "closed"
+
+
+def test_only_one_half_open_probe():
+    breaker = CircuitBreaker(threshold=1, cooldown=0.1)
+    breaker.on_failure()
+    calls, lock = [], threading.Lock()
+
+    def call():
+        breaker.before_call()
+        with lock:
+            calls.append(time.monotonic())
+            probes = len(calls)
+        if probes == 1:
+            time.sleep(0.2)   # l'essai est lent : personne ne doit passer pendant ce temps
+        breaker.on_success()
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        list(pool.map(lambda _: call(), range(5)))
+    assert len(calls) == 5
+    assert all(t - calls[0] >= 0.15 for t in calls[1:])
+
+
+def test_pages_requested_while_open_are_not_lost():
+    throttle = HostThrottle(rate=1000, retries=0)
+    throttle.breaker = CircuitBreaker(threshold=2, cooldown=0.2)
+    statuses = iter([503, 503] + [200] * 10)
+    lock = threading.Lock()
+
+    def call():
+        with lock:
+            return Response(next(statuses))
+
+    for _ in range(2):
+        with pytest.raises(requests.HTTPError):
+            throttle.request(call)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda _: throttle.request(call).status_code, range(8)))
+    assert results == [200] * 8
+
+
+def test_forbidden_is_overload():
+    throttle = HostThrottle(rate=1000, concurrency=8, retries=3)
+    with pytest.raises(requests.HTTPError):
+        throttle.request(lambda: Response(403))
+    assert throttle.requests == 1          # pas de reprise
+    assert throttle.limiter.limit == 4     # parallélisme divisé par 2
+    assert throttle.breaker.failures == 1
@@ -0,0 +1,223 @@
+from urllib.parse import urlsplit
+import requests
+import random
+import threading
+import time
+import logging
+
+# Limitation de débit par hôte pour le crawler dakar-auto :
+#  - seau à jetons (requêtes / seconde)
+#  - contrôle AIMD du nombre de requêtes simultanées
+#  - reprises avec backoff exponentiel + jitter
+#  - disjoncteur (circuit breaker)
+
+DEFAULT_RATE = 5.0          # requêtes / seconde
+DEFAULT_BURST = 10
+DEFAULT_CONCURRENCY = 4     # parallélisme de départ
+MAX_CONCURRENCY = 32
+LATENCY_TARGET = 2.0        # secondes ; au-delà on n'augmente plus
+RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+BREAKER_THRESHOLD = 5       # échecs consécutifs avant ouverture
+BREAKER_COOLDOWN = 30.0     # secondes avant un essai (half-open)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+OVERLOAD_STATUSES = {403}   # refus (blocage du crawler) : pas de reprise, mais on ralentit
+
+
+class TokenBucket:
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class AimdLimiter:
+    # nombre de requêtes simultanées : +1 par "fenêtre" saine, divisé par 2 sur surcharge
+
+    def __init__(self, initial=DEFAULT_CONCURRENCY, minimum=1, maximum=MAX_CONCURRENCY,
+                 latency_target=LATENCY_TARGET):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def __enter__(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+        return self
+
+    def __exit__(self, *exc):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self, latency):
+        with self._cond:
+            if latency <= self.latency_target:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+                self._cond.notify_all()
+
+    def on_overload(self):
+        with self._cond:
+            self.limit = max(self.minimum, self.limit / 2)
+
+
+class CircuitBreaker:
+    # circuit ouvert : les requêtes attendent la fin du refroidissement (elles ne sont pas
+    # abandonnées), puis une seule requête d'essai passe ; les autres attendent son résultat
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self._cond = threading.Condition()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def before_call(self):
+        with self._cond:
+            while self.opened_at is not None:
+                wait = self.opened_at + self.cooldown - time.monotonic()
+                if wait <= 0 and not self.probing:
+                    self.probing = True
+                    return
+                self._cond.wait(wait if wait > 0 else None)
+
+    def on_success(self):
+        with self._cond:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+            self._cond.notify_all()
+
+    def on_failure(self):
+        with self._cond:
+            self.failures += 1
+            if self.failures >= self.threshold or self.opened_at is not None:
+                # (ré)ouverture, y compris après un essai half-open raté
+                self.opened_at = time.monotonic()
+            self.probing = False
+            self._cond.notify_all()
+
+
+def backoff_delay(attempt, retry_after=None):
+    if retry_after is not None:
+        return min(BACKOFF_MAX, retry_after)
+    # "full jitter" : uniforme entre 0 et base * 2^attempt
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+def parse_retry_after(response):
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+class HostThrottle:
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, concurrency=DEFAULT_CONCURRENCY,
+                 max_concurrency=MAX_CONCURRENCY, retries=RETRIES):
+        self.bucket = TokenBucket(rate, burst)
+        self.limiter = AimdLimiter(concurrency, maximum=max_concurrency)
+        self.breaker = CircuitBreaker()
+        self.retries = retries
+        self.requests = 0
+        self.failures = 0
+
+    def request(self, call):
+        # call() -> réponse requests ; reprise sur 429/5xx/timeout
+        for attempt in range(self.retries + 1):
+            self.breaker.before_call()
+            self.bucket.take()
+
+            response, error = None, None
+            with self.limiter:
+                start = time.monotonic()
+                try:
+                    response = call()
+                except (requests.Timeout, requests.ConnectionError) as e:
+                    error = e
+                except Exception:
+                    # erreur inattendue : l'éventuel essai half-open ne doit pas rester bloqué
+                    self.breaker.on_failure()
+                    raise
+                latency = time.monotonic() - start
+            self.requests += 1
+
+            if error is None and response.status_code not in RETRY_STATUSES | OVERLOAD_STATUSES:
+                self.limiter.on_success(latency)
+                self.breaker.on_success()
+                return response
+
+            self.failures += 1
+            self.limiter.on_overload()
+            self.breaker.on_failure()
+            if error is None and response.status_code in OVERLOAD_STATUSES:
+                response.raise_for_status()
+            if attempt == self.retries:
+                if error is not None:
+                    raise error
+                response.raise_for_status()   # 429 / 5xx persistant : échec, pas une page
+
+            delay = backoff_delay(attempt, parse_retry_after(response) if response is not None else None)
+            logging.info(f"Surcharge ({error or response.status_code}), nouvel essai dans {delay:.1f}s")
+            time.sleep(delay)
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "concurrency": int(self.limiter.limit),
+            "circuit": self.breaker.state,
+        }
+
+
+class Throttle:
+    # un HostThrottle par hôte
+
+    def __init__(self, **options):
+        self.options = options
+        self.hosts = {}
+        self._lock = threading.Lock()
+
+    def for_url(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self.hosts:
+                self.hosts[host] = HostThrottle(**self.options)
+            return self.hosts[host]
+
+    def request(self, url, call):
+        return self.for_url(url).request(call)
+
+    def stats(self):
+        return {host: t.stats() for host, t in self.hosts.items()}